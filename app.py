@@ -1,20 +1,22 @@
 """
 Entry point for Hugging Face Spaces deployment.
-This file sets up the FastAPI app with background scheduler and worker threads.
+This file sets up the FastAPI app with background scheduler and worker tasks.
 """
 
 import asyncio
 import logging
 import os
-import threading
-import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.main import app as main_app
+from app.scheduler import run_crawl_job
+from app.workers.summarizer_worker import SummarizerWorker
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,22 +24,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="News Crawler API",
-    description="News crawler and summarization API deployed on Hugging Face Spaces",
-    version="1.0.0"
-)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.mount("/", main_app)
-
 
 class PersistentScheduler:
     """
@@ -45,24 +31,36 @@ class PersistentScheduler:
     Handles scheduled tasks with state persistence.
     """
     
-    def __init__(self, crawl_interval: int = 2400, worker_interval: int = 300):
+    def __init__(self, crawl_interval: int = 2400, worker_interval: int = 300, retry_delay: int = 60):
         self.crawl_interval = crawl_interval  # 40 minutes in seconds
         self.worker_interval = worker_interval  # 5 minutes in seconds
+        self.retry_delay = retry_delay  # 1 minute in seconds
         self.last_crawl_run: Optional[datetime] = None
         self.last_worker_run: Optional[datetime] = None
         self.running = True
         
+    @staticmethod
+    def _seconds_until(last_run: Optional[datetime], interval: int) -> float:
+        if not last_run:
+            return 0.0
+        elapsed = (datetime.now(timezone.utc) - last_run).total_seconds()
+        return max(0.0, interval - elapsed)
+
+    def seconds_until_crawl(self) -> float:
+        """Seconds left until the crawl job is due."""
+        return self._seconds_until(self.last_crawl_run, self.crawl_interval)
+
+    def seconds_until_worker(self) -> float:
+        """Seconds left until the worker job is due."""
+        return self._seconds_until(self.last_worker_run, self.worker_interval)
+
     def should_run_crawl(self) -> bool:
         """Check if crawl job should run."""
-        if not self.last_crawl_run:
-            return True
-        return (datetime.now(timezone.utc) - self.last_crawl_run).total_seconds() >= self.crawl_interval
-    
+        return self.seconds_until_crawl() <= 0
+
     def should_run_worker(self) -> bool:
         """Check if worker job should run."""
-        if not self.last_worker_run:
-            return True
-        return (datetime.now(timezone.utc) - self.last_worker_run).total_seconds() >= self.worker_interval
+        return self.seconds_until_worker() <= 0
     
     def mark_crawl_run(self):
         """Mark crawl job as run."""
@@ -83,80 +81,104 @@ class PersistentScheduler:
 scheduler = PersistentScheduler()
 
 
-def run_scheduler():
+async def _crawl_loop():
     """
-    Run the scheduler in a background thread.
-    This function handles both crawl and worker jobs.
+    Run the crawl job on the app's event loop, sleeping until the next deadline.
     """
-    logger.info("Starting persistent scheduler thread...")
-    
+    logger.info("Starting crawl scheduler task...")
+
     while scheduler.running:
+        delay = scheduler.seconds_until_crawl()
+        if delay > 0:
+            await asyncio.sleep(delay)
+            continue
+
+        logger.info("Running scheduled crawl job...")
         try:
-            if scheduler.should_run_crawl():
-                logger.info("Running scheduled crawl job...")
-                try:
-                    from app.scheduler import run_crawl_job
-                    
-                    asyncio.run(run_crawl_job(max_concurrent=3))
-                    scheduler.mark_crawl_run()
-                    logger.info("Crawl job completed successfully")
-                except Exception as e:
-                    logger.error("Error running crawl job: %s", e)
-            
-            if scheduler.should_run_worker():
-                logger.info("Running worker job...")
-                try:
-                    from app.workers.summarizer_worker import SummarizerWorker
-                    
-                    worker = SummarizerWorker(max_concurrent=1)
-                    asyncio.run(worker.run_once())
-                    scheduler.mark_worker_run()
-                    logger.info("Worker job completed successfully")
-                except Exception as e:
-                    logger.error("Error running worker job: %s", e)
-            
-            time.sleep(60)  # Check every minute
-            
+            await run_crawl_job(max_concurrent=3)
+            scheduler.mark_crawl_run()
+            logger.info("Crawl job completed successfully")
         except Exception as e:
-            logger.error("Unexpected error in scheduler: %s", e)
-            time.sleep(300)  # 5 minutes
-    
-    logger.info("Scheduler thread stopped")
+            logger.error("Error running crawl job: %s", e)
+            await asyncio.sleep(scheduler.retry_delay)
 
+    logger.info("Crawl scheduler task stopped")
 
-scheduler_thread: Optional[threading.Thread] = None
 
+async def _worker_loop():
+    """
+    Run the summarizer worker on the app's event loop, sleeping until the next deadline.
+    """
+    logger.info("Starting worker scheduler task...")
 
-@app.on_event("startup")
-async def startup_event():
-    """Start background threads when the app starts."""
-    global scheduler_thread
-    
+    while scheduler.running:
+        delay = scheduler.seconds_until_worker()
+        if delay > 0:
+            await asyncio.sleep(delay)
+            continue
+
+        logger.info("Running worker job...")
+        try:
+            worker = SummarizerWorker(max_concurrent=1)
+            await worker.run_once()
+            scheduler.mark_worker_run()
+            logger.info("Worker job completed successfully")
+        except Exception as e:
+            logger.error("Error running worker job: %s", e)
+            await asyncio.sleep(scheduler.retry_delay)
+
+    logger.info("Worker scheduler task stopped")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background scheduler tasks for the lifetime of the app."""
     logger.info("Starting up Hugging Face Spaces application...")
     
     os.environ["HUGGINGFACE_SPACES"] = "true"
     
-    scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-    scheduler_thread.start()
-    logger.info("Scheduler thread started")
-    
-    logger.info("Application startup complete")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Clean up when the app shuts down."""
-    logger.info("Shutting down Hugging Face Spaces application...")
+    thread_pool_size = int(os.getenv("THREAD_POOL_SIZE", "16"))
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=thread_pool_size))
     
-    if scheduler:
+    # Mounted apps do not get lifespan events, so run the API's here
+    async with main_app.router.lifespan_context(main_app):
+        tasks: List[asyncio.Task] = [
+            asyncio.create_task(_crawl_loop()),
+            asyncio.create_task(_worker_loop()),
+        ]
+        logger.info("Scheduler tasks started")
+        
+        logger.info("Application startup complete")
+        yield
+        
+        logger.info("Shutting down Hugging Face Spaces application...")
+        
         scheduler.stop()
-    
-    if scheduler_thread and scheduler_thread.is_alive():
-        scheduler_thread.join(timeout=5)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
     
     logger.info("Application shutdown complete")
 
 
+app = FastAPI(
+    title="News Crawler API",
+    description="News crawler and summarization API deployed on Hugging Face Spaces",
+    version="1.0.0",
+    lifespan=lifespan,
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+app.mount("/", main_app)
+
+
 @app.get("/")
 async def root():
     """Root endpoint for health check."""
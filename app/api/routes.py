@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import logging
+import time
+from collections import defaultdict
 from datetime import datetime, date, timezone
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from uuid import UUID, uuid4
 
+import orjson
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, HttpUrl, Field
+from app.db.redis_client import NEWS_LIST_CACHE_TTL, NEWS_VERSION_KEY, bump_news_version, get_redis_client
 from app.scheduler import run_crawl_job, run_cleanup_job, run_prioritizer, run_summarizer
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/news", tags=["news"])
 
 
@@ -36,6 +46,7 @@ try:
         fetch_news,
         fetch_news_by_id,
         count_news,
+        iter_news,
     )
 
     HAVE_DB = True
@@ -68,6 +79,60 @@ except Exception:
         },
     ]
 
+    # Lookup structures over _FAKE_DATA, built once so requests never re-lowercase records
+    _FAKE_BY_ID: Dict[str, dict] = {r["id"]: r for r in _FAKE_DATA}
+    _FAKE_BY_CATEGORY: Dict[str, List[int]] = defaultdict(list)
+    _FAKE_BY_SOURCE: Dict[str, List[int]] = defaultdict(list)
+    for _i, _r in enumerate(_FAKE_DATA):
+        _FAKE_BY_CATEGORY[(_r.get("category") or "").lower()].append(_i)
+        _FAKE_BY_SOURCE[(_r.get("source") or "").lower()].append(_i)
+    _FAKE_TEXT: List[Tuple[str, str]] = [
+        (r["title"].lower(), (r.get("summary") or "").lower()) for r in _FAKE_DATA
+    ]
+    _FAKE_DATES: List[Optional[date]] = [
+        r["publish_date"].date() if r.get("publish_date") else None for r in _FAKE_DATA
+    ]
+
+
+NEWS_CACHE_TIMEOUT = 0.5  # Seconds to wait on Redis before serving the page from the database
+NEWS_CACHE_COOLDOWN = 30.0  # Seconds to skip the cache after a Redis failure
+
+# Read the list version and the page cached under it in one round trip.
+# Returns {version, page or nil}.
+_LIST_LOOKUP_LUA = """
+local version = redis.call('GET', KEYS[1]) or '0'
+return {version, redis.call('GET', 'news:list:' .. version .. ':' .. ARGV[1]) or false}
+"""
+
+_list_lookup = None
+_cache_down_until = 0.0
+
+
+def _list_cache_key(version: str, digest: str) -> str:
+    return f"news:list:{version}:{digest}"
+
+
+async def _lookup_list_page(digest: str) -> Tuple[str, Optional[str]]:
+    """
+    Return the current list version and the cached page for digest, if any.
+    """
+    global _list_lookup
+    redis_client = await get_redis_client()
+    if _list_lookup is None:
+        _list_lookup = redis_client.register_script(_LIST_LOOKUP_LUA)
+    version, page = await _list_lookup(keys=[NEWS_VERSION_KEY], args=[digest], client=redis_client)
+    return version, page
+
+
+def _cache_failed(action: str, e: Exception) -> None:
+    """
+    Skip the list cache for NEWS_CACHE_COOLDOWN seconds, so a Redis outage costs
+    one slow request instead of a timeout on every page.
+    """
+    global _cache_down_until
+    _cache_down_until = time.monotonic() + NEWS_CACHE_COOLDOWN
+    logger.warning("News list cache %s failed; skipping the cache for %.0fs: %r", action, NEWS_CACHE_COOLDOWN, e)
+
 
 @router.get("", response_model=NewsListResponse)
 async def list_news(
@@ -81,48 +146,82 @@ async def list_news(
 ) -> NewsListResponse:
     """
     List news with optional filters and pagination.
+    Pages are cached in Redis for NEWS_LIST_CACHE_TTL seconds, keyed by the query
+    parameters and a version bumped after every crawl and cleanup. Redis gets
+    NEWS_CACHE_TIMEOUT seconds per call and is skipped for a while after a failure.
     """
     if HAVE_DB:
-        items: List[NewsItemOut] = await fetch_news(
-            q=q,
-            category=category,
-            source=source,
-            from_date=from_date,
-            to_date=to_date,
-            limit=limit,
-            offset=offset,
-        )
-        total: int = await count_news(
-            q=q,
-            category=category,
-            source=source,
-            from_date=from_date,
-            to_date=to_date,
+        cache_key: Optional[str] = None
+        if time.monotonic() >= _cache_down_until:
+            try:
+                digest = hashlib.sha1(orjson.dumps({
+                    "q": q,
+                    "category": category,
+                    "source": source,
+                    "from_date": from_date,
+                    "to_date": to_date,
+                    "limit": limit,
+                    "offset": offset,
+                }, option=orjson.OPT_SORT_KEYS)).hexdigest()
+                version, cached = await asyncio.wait_for(_lookup_list_page(digest), NEWS_CACHE_TIMEOUT)
+                if cached:
+                    return Response(content=cached, media_type="application/json")
+                cache_key = _list_cache_key(version, digest)
+            except Exception as e:
+                _cache_failed("lookup", e)
+
+        items, total = await asyncio.gather(
+            fetch_news(
+                q=q,
+                category=category,
+                source=source,
+                from_date=from_date,
+                to_date=to_date,
+                limit=limit,
+                offset=offset,
+            ),
+            count_news(
+                q=q,
+                category=category,
+                source=source,
+                from_date=from_date,
+                to_date=to_date,
+            ),
         )
-        return NewsListResponse(total=total, limit=limit, offset=offset, items=items)
+        # Rows come back from PostgREST already typed; encode them as-is rather than
+        # revalidating every item through NewsItemOut
+        payload = orjson.dumps({"total": total, "limit": limit, "offset": offset, "items": items})
+        if cache_key:
+            try:
+                await asyncio.wait_for(
+                    (await get_redis_client()).set(cache_key, payload, ex=NEWS_LIST_CACHE_TTL),
+                    NEWS_CACHE_TIMEOUT,
+                )
+            except Exception as e:
+                _cache_failed("store", e)
+        return Response(content=payload, media_type="application/json")
 
-    data = _FAKE_DATA
+    candidates: Iterable[int] = range(len(_FAKE_DATA))
+    if category:
+        candidates = _FAKE_BY_CATEGORY.get(category.lower(), [])
+    if source:
+        in_source = set(_FAKE_BY_SOURCE.get(source.lower(), []))
+        candidates = [i for i in candidates if i in in_source]
+    qs = q.lower() if q else None
 
-    def _match(record: dict) -> bool:
-        if q:
-            qs = q.lower()
-            if qs not in record["title"].lower() and qs not in (record.get("summary") or "").lower():
+    def _match(i: int) -> bool:
+        if qs:
+            title, summary = _FAKE_TEXT[i]
+            if qs not in title and qs not in summary:
                 return False
-        if category and (record.get("category") or "").lower() != category.lower():
+        pd = _FAKE_DATES[i]
+        if pd and from_date and pd < from_date:
             return False
-        if source and (record.get("source") or "").lower() != source.lower():
+        if pd and to_date and pd > to_date:
             return False
-        if from_date:
-            pd: Optional[datetime] = record.get("publish_date")
-            if pd and pd.date() < from_date:
-                return False
-        if to_date:
-            pd = record.get("publish_date")
-            if pd and pd.date() > to_date:
-                return False
         return True
 
-    filtered = [r for r in data if _match(r)]
+    filtered = [_FAKE_DATA[i] for i in candidates if _match(i)]
     total = len(filtered)
     page = filtered[offset : offset + limit]
 
@@ -130,6 +229,40 @@ async def list_news(
     return NewsListResponse(total=total, limit=limit, offset=offset, items=items)
 
 
+@router.get("/stream")
+async def stream_news(
+    q: Optional[str] = Query(None, description="Full-text query on title/summary"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    source: Optional[str] = Query(None, description="Filter by source domain"),
+    from_date: Optional[date] = Query(None, description="Publish date from (inclusive)"),
+    to_date: Optional[date] = Query(None, description="Publish date to (inclusive)"),
+    limit: int = Query(1000, ge=1, le=10000, description="Max items to return (1-10000)"),
+) -> StreamingResponse:
+    """
+    Stream matching news as a JSON array, fetched and encoded one chunk of rows at a time.
+    """
+    if not HAVE_DB:
+        raise HTTPException(status_code=503, detail="Database not configured")
+
+    async def body():
+        yield b"["
+        first = True
+        async for rows in iter_news(
+            q=q,
+            category=category,
+            source=source,
+            from_date=from_date,
+            to_date=to_date,
+            limit=limit,
+        ):
+            chunk = orjson.dumps(rows)[1:-1]
+            yield chunk if first else b"," + chunk
+            first = False
+        yield b"]"
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
 @router.get("/{news_id}", response_model=NewsItemOut)
 async def get_news(news_id: str) -> NewsItemOut:
     """
@@ -139,17 +272,17 @@ async def get_news(news_id: str) -> NewsItemOut:
         item = await fetch_news_by_id(news_id)
         if item is None:
             raise HTTPException(status_code=404, detail="News not found")
-        return item
+        return ORJSONResponse(item)
 
-    for r in _FAKE_DATA:
-        if r["id"] == news_id:
-            return NewsItemOut(**r)
+    r = _FAKE_BY_ID.get(news_id)
+    if r is not None:
+        return NewsItemOut(**r)
     raise HTTPException(status_code=404, detail="News not found")
 
 
 @router.post("/crawl")
 async def trigger_crawl(
-    concurrency: int = Query(3, ge=1, le=10, description="Max concurrent domains to crawl"),
+    concurrency: int = Query(3, ge=1, le=10, description="Max concurrent requests per host while crawling"),
     domains: Optional[str] = Query(None, description="Comma-separated domain list to crawl (override defaults)"),
 ):
     """
@@ -170,9 +303,7 @@ async def trigger_cleanup(
     Trigger a cleanup job to delete old news.
     Example: POST /api/news/cleanup?days=30&by_publish=true
     """
-    from app.db.crud import delete_older_than  # type: ignore
-
-    deleted = await delete_older_than(days=days, by_publish_date=by_publish)
+    deleted = await run_cleanup_job(days=days, by_publish_date=by_publish)
     return {"status": "ok", "deleted": deleted}
 
 
@@ -213,4 +344,9 @@ async def trigger_cleanup_placeholders(
     """
     from app.db.crud import delete_placeholder_summaries  # type: ignore
     deleted = await delete_placeholder_summaries(placeholder=placeholder)
+    if deleted > 0:
+        try:
+            await bump_news_version()
+        except Exception as e:
+            logger.warning("Failed to invalidate cached news lists: %s", e)
     return {"status": "ok", "deleted": deleted, "placeholder": placeholder}
\ No newline at end of file
@@ -1,90 +1,185 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
+import os
+import re
 from datetime import datetime, timezone
-from typing import Dict, Iterable, List, Optional, Set, Tuple
-from urllib.parse import urlparse
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
 
 import httpx
 import feedparser
-from bs4 import BeautifulSoup
+from lxml import etree
+from selectolax.lexbor import LexborHTMLParser
 
 from app.crawler.utils import (
-    RateLimiter,
+    USER_AGENT,
+    HostLimiter,
     clean_text,
     compute_content_hash,
     domain_from_url,
-    fetch_html,
-    fetch_text,
+    fetch_text_with_headers,
+    fetch_tree,
+    html_to_text,
     normalize_url,
     parse_feed_datetime,
+    parse_retry_after,
     to_utc,
 )
-from app.db.crud import upsert_news
+from app.db.crud import upsert_news, upsert_news_batch
 
 logger = logging.getLogger(__name__)
 
+MAX_TOTAL_REQUESTS = int(os.environ.get("CRAWL_MAX_TOTAL_REQUESTS", "20"))  # In-flight request cap across all hosts
+HOST_RATE_LIMIT = float(os.environ.get("CRAWL_HOST_RPS", "5.0"))  # Requests per second per host
 
-def default_sources() -> Dict[str, List[str]]:
+_client: Optional[httpx.AsyncClient] = None
+
+
+async def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared crawler HTTP client, creating it on first use.
+    Reusing one pooled client keeps TCP/TLS connections alive across crawl runs.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=20.0,
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200, keepalive_expiry=60),
+            headers={"User-Agent": USER_AGENT},
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """
+    Close the shared crawler HTTP client.
     """
-    Map of domain -> list of RSS feed URLs to try in order.
+    global _client
+    if _client is not None:
+        try:
+            await _client.aclose()
+        except Exception:
+            pass
+        _client = None
+
+
+@functools.lru_cache(maxsize=None)
+def default_sources() -> Mapping[str, Tuple[str, ...]]:
+    """
+    Map of domain -> tuple of RSS feed URLs to try in order.
     Some are heuristics; adjust as needed.
+    Built once and returned read-only.
     """
-    return {
-        "kompas.com": [
+    return MappingProxyType({
+        "kompas.com": (
             "https://news.kompas.com/rss",
             "https://indeks.kompas.com/rss",
-        ],
-        "detik.com": [
+        ),
+        "detik.com": (
             "https://rss.detik.com/index.php",
             "https://rss.detik.com/index.php/detikcom",
-        ],
-        "tempo.co": [
+        ),
+        "tempo.co": (
             "https://rss.tempo.co/",
-        ],
-        "antaranews.com": [
+        ),
+        "antaranews.com": (
             "https://www.antaranews.com/rss/terkini",
             "https://www.antaranews.com/rss/nasional",
-        ],
-        "bbc.com": [
+        ),
+        "bbc.com": (
             "http://feeds.bbci.co.uk/news/world/rss.xml",
             "http://feeds.bbci.co.uk/news/rss.xml",
-        ],
-        "cnbcindonesia.com": [
+        ),
+        "cnbcindonesia.com": (
             "https://www.cnbcindonesia.com/rss/",
-        ],
-        "republika.co.id": [
+        ),
+        "republika.co.id": (
             "https://www.republika.co.id/rss",
             "https://www.republika.co.id/rss/nasional",
-        ],
-        "katadata.co.id": [
+        ),
+        "katadata.co.id": (
             "https://katadata.co.id/rss",
-        ],
-        "theguardian.com": [
+        ),
+        "theguardian.com": (
             "https://www.theguardian.com/world/rss",
             "https://www.theguardian.com/international/rss",
-        ],
-        "nytimes.com": [
+        ),
+        "nytimes.com": (
             "https://rss.nytimes.com/services/xml/rss/nyt/World.xml",
             "https://rss.nytimes.com/services/xml/rss/nyt/HomePage.xml",
-        ],
-    }
+        ),
+    })
 
 
-def _feed_guessers(domain: str) -> List[str]:
+@functools.lru_cache(maxsize=None)
+def _feed_guessers(domain: str) -> Tuple[str, ...]:
     """
     Fallback RSS feed guessers if no explicit list succeeded.
     """
     scheme = "https"
     base = f"{scheme}://{domain}"
-    return [
+    return (
         f"{base}/rss",
         f"{base}/feed",
         f"{base}/feeds",
         f"{base}/rss.xml",
         f"{base}/feed.xml",
-    ]
+    )
+
+
+_TAG_CATEGORIES: Mapping[str, str] = MappingProxyType({
+    "politik": "politik",
+    "politics": "politik",
+    "pemerintah": "politik",
+    "ekonomi": "ekonomi",
+    "economy": "ekonomi",
+    "bisnis": "bisnis",
+    "business": "bisnis",
+    "market": "bisnis",
+    "keuangan": "bisnis",
+    "teknologi": "teknologi",
+    "technology": "teknologi",
+    "tech": "teknologi",
+    "sains": "teknologi",
+    "olahraga": "olahraga",
+    "sport": "olahraga",
+    "hiburan": "hiburan",
+    "entertainment": "hiburan",
+    "seleb": "hiburan",
+    "kesehatan": "kesehatan",
+    "health": "kesehatan",
+    "internasional": "internasional",
+    "world": "internasional",
+    "dunia": "internasional",
+    "nasional": "nasional",
+    "indonesia": "nasional",
+})
+
+# (substring, category) pairs scanned longest-first when a tag is not an exact key,
+# so more specific keywords win (e.g. "technology" before "tech")
+_TAG_SUBSTRINGS: Tuple[Tuple[str, str], ...] = tuple(
+    sorted(_TAG_CATEGORIES.items(), key=lambda kv: -len(kv[0]))
+)
+
+_CATEGORY_KEYWORDS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("politik", ("pemerintah", "politik", "pilpres", "pemilu", "menteri", "dpr", "presiden")),
+    ("bisnis", ("ekonomi", "bisnis", "pasar", "market", "saham", "rupiah", "harga", "investasi", "apbn", "pajak")),
+    ("teknologi", ("teknologi", "ai", "gadget", "aplikasi", "software", "internet", "startup")),
+    ("olahraga", ("olahraga", "sport", "liga", "sepak bola", "badminton", "basket", "turnamen")),
+    ("hiburan", ("hiburan", "artis", "film", "musik", "konser", "seleb")),
+    ("kesehatan", ("kesehatan", "vaksin", "rumah sakit", "dokter", "gizi")),
+    ("internasional", ("dunia", "internasional", "global", "asing", "luar negeri")),
+    ("nasional", ("indonesia", "nasional", "jakarta", "provinsi", "kabupaten", "kota")),
+)
+
+# One substring alternation per category, checked in priority order
+_CATEGORY_PATTERNS: Tuple[Tuple[str, re.Pattern], ...] = tuple(
+    (cat, re.compile("|".join(map(re.escape, words)))) for cat, words in _CATEGORY_KEYWORDS
+)
 
 
 def _extract_category(entry: dict) -> Optional[str]:
@@ -94,42 +189,16 @@ def _extract_category(entry: dict) -> Optional[str]:
     """
     try:
         tags = entry.get("tags") or []
-        MAIN = {
-            "politik": "politik",
-            "politics": "politik",
-            "pemerintah": "politik",
-            "ekonomi": "ekonomi",
-            "economy": "ekonomi",
-            "bisnis": "bisnis",
-            "business": "bisnis",
-            "market": "bisnis",
-            "keuangan": "bisnis",
-            "teknologi": "teknologi",
-            "technology": "teknologi",
-            "tech": "teknologi",
-            "sains": "teknologi",
-            "olahraga": "olahraga",
-            "sport": "olahraga",
-            "hiburan": "hiburan",
-            "entertainment": "hiburan",
-            "seleb": "hiburan",
-            "kesehatan": "kesehatan",
-            "health": "kesehatan",
-            "internasional": "internasional",
-            "world": "internasional",
-            "dunia": "internasional",
-            "nasional": "nasional",
-            "indonesia": "nasional",
-        }
         for t in tags:
             term = t.get("term")
             if isinstance(term, str) and term.strip():
                 k = term.strip().lower()
-                if k in MAIN:
-                    return MAIN[k]
-                for key in MAIN.keys():
+                cat = _TAG_CATEGORIES.get(k)
+                if cat:
+                    return cat
+                for key, cat in _TAG_SUBSTRINGS:
                     if key in k:
-                        return MAIN[key]
+                        return cat
     except Exception:
         pass
     return None
@@ -138,37 +207,89 @@ def _guess_main_category(text: Optional[str]) -> Optional[str]:
     if not text:
         return None
     s = text.lower()
-    if any(w in s for w in ["pemerintah", "politik", "pilpres", "pemilu", "menteri", "dpr", "presiden"]):
-        return "politik"
-    if any(w in s for w in ["ekonomi", "bisnis", "pasar", "market", "saham", "rupiah", "harga", "investasi", "apbn", "pajak"]):
-        return "bisnis"
-    if any(w in s for w in ["teknologi", "ai", "gadget", "aplikasi", "software", "internet", "startup"]):
-        return "teknologi"
-    if any(w in s for w in ["olahraga", "sport", "liga", "sepak bola", "badminton", "basket", "turnamen"]):
-        return "olahraga"
-    if any(w in s for w in ["hiburan", "artis", "film", "musik", "konser", "seleb"]):
-        return "hiburan"
-    if any(w in s for w in ["kesehatan", "vaksin", "rumah sakit", "dokter", "gizi"]):
-        return "kesehatan"
-    if any(w in s for w in ["dunia", "internasional", "global", "asing", "luar negeri"]):
-        return "internasional"
-    if any(w in s for w in ["indonesia", "nasional", "jakarta", "provinsi", "kabupaten", "kota"]):
-        return "nasional"
+    for cat, pat in _CATEGORY_PATTERNS:
+        if pat.search(s):
+            return cat
     return None
 
 
+_FEED_PARSER = etree.XMLParser(encoding="utf-8", resolve_entities=False, no_network=True)
+
+
+def _lxml_entry(el: etree._Element) -> dict:
+    """
+    Convert an RSS <item> or Atom <entry> element into a feedparser-like entry dict.
+    """
+    link = (el.findtext("{*}link") or "").strip() or None
+    if not link:
+        for ln in el.iterfind("{*}link"):
+            href = ln.get("href")
+            if href and ln.get("rel", "alternate") == "alternate":
+                link = href.strip()
+                break
+
+    entry: dict = {
+        "link": link,
+        "title": el.findtext("{*}title"),
+        "description": (
+            el.findtext("{http://purl.org/rss/1.0/modules/content/}encoded")
+            or el.findtext("{*}content")
+            or el.findtext("{*}description")
+            or el.findtext("{*}summary")
+        ),
+    }
+    for key, tag in (("published", "pubDate"), ("published", "published"), ("updated", "updated"), ("date", "date")):
+        if key not in entry:
+            val = el.findtext("{*}" + tag)
+            if val:
+                entry[key] = val.strip()
+
+    tags = []
+    for c in el.iterfind("{*}category"):
+        term = c.get("term") or c.text
+        if term:
+            tags.append({"term": term})
+    entry["tags"] = tags
+    return entry
+
+
+def _parse_feed_entries(text: str) -> List[dict]:
+    """
+    Parse RSS/Atom entries with lxml, falling back to feedparser for feeds lxml rejects.
+    """
+    try:
+        root = etree.fromstring(text.encode("utf-8"), parser=_FEED_PARSER)
+    except (etree.XMLSyntaxError, ValueError):
+        return feedparser.parse(text).entries
+    return [_lxml_entry(el) for el in root.iter("{*}item", "{*}entry")]
+
+
+DESCRIPTION_MAX_CHARS = 2000  # Same cap the article extractor applies
+
+
+def _entry_description(e: dict) -> Optional[str]:
+    """
+    Feed-provided article text: full content when the feed has it, else the description.
+    """
+    raw = e.get("description")
+    content = e.get("content")
+    if isinstance(content, list) and content:
+        raw = content[0].get("value") or raw
+    text = html_to_text(raw)
+    return text[:DESCRIPTION_MAX_CHARS] if text else None
+
+
 async def _parse_rss_content(text: str, source_domain: str) -> List[dict]:
-    parsed = feedparser.parse(text)
+    entries = await asyncio.to_thread(_parse_feed_entries, text)
     items: List[dict] = []
     now = datetime.now(timezone.utc)
 
-    for e in parsed.entries:
+    for e in entries:
         url = e.get("link")
         title = clean_text(e.get("title"))
         if not url or not title:
             continue
 
-        summary = None
         publish_date = parse_feed_datetime(e)
         if publish_date:
             publish_date = to_utc(publish_date)
@@ -177,6 +298,7 @@ async def _parse_rss_content(text: str, source_domain: str) -> List[dict]:
             "title": title,
             "url": url,
             "summary": None,  # Don't store summaries in crawler - let the summarizer worker handle it
+            "description": _entry_description(e),
             "source": source_domain,
             "category": (_extract_category(e) or _guess_main_category(title)),
             "publish_date": publish_date,
@@ -187,27 +309,23 @@ async def _parse_rss_content(text: str, source_domain: str) -> List[dict]:
     return items
 
 
+_NETLOC_RE = re.compile(r"^https?://(?:www\.)?([^/?#]+)", re.IGNORECASE)
+
+
 def _unique_urls(urls: Iterable[str], domain: str, limit: int = 30) -> List[str]:
-    seen: Set[str] = set()
-    out: List[str] = []
+    out: Dict[str, None] = {}
     for u in urls:
-        try:
-            netloc = urlparse(u).netloc.lower()
-            if netloc.startswith("www."):
-                netloc = netloc[4:]
-            if netloc and domain not in netloc:
-                continue
-        except Exception:
+        m = _NETLOC_RE.match(u)
+        if not m or domain not in m.group(1).lower():
             continue
-        if u not in seen:
-            seen.add(u)
-            out.append(u)
-        if len(out) >= limit:
-            break
-    return out
+        if u not in out:
+            out[u] = None
+            if len(out) >= limit:
+                break
+    return list(out)
 
 
-def _html_candidate_links(soup: BeautifulSoup, base_url: str) -> List[Tuple[str, Optional[str]]]:
+def _html_candidate_links(tree: LexborHTMLParser, base_url: str) -> List[Tuple[str, Optional[str]]]:
     """
     Extract candidate article links with optional titles from an HTML document.
     Heuristics: headlines, article anchors, h2/h3 within anchors, data- attributes.
@@ -224,46 +342,57 @@ def _html_candidate_links(soup: BeautifulSoup, base_url: str) -> List[Tuple[str,
         "a[href][aria-label]",
         "a[href][title]",
     ]:
-        for a in soup.select(sel):
-            href = normalize_url(base_url, a.get("href"))
+        for a in tree.css(sel):
+            attrs = a.attributes
+            href = normalize_url(base_url, attrs.get("href"))
             if not href:
                 continue
-            text = clean_text(a.get_text()) or clean_text(a.get("title")) or clean_text(a.get("aria-label"))
+            text = clean_text(a.text()) or clean_text(attrs.get("title")) or clean_text(attrs.get("aria-label"))
             candidates.append((href, text))
 
     if not candidates:
-        for a in soup.find_all("a", href=True):
-            href = normalize_url(base_url, a.get("href"))
+        for a in tree.css("a[href]"):
+            attrs = a.attributes
+            href = normalize_url(base_url, attrs.get("href"))
             if not href:
                 continue
-            text = clean_text(a.get_text()) or clean_text(a.get("title"))
+            text = clean_text(a.text()) or clean_text(attrs.get("title"))
             candidates.append((href, text))
 
     return candidates
 
 
-async def _html_fallback_scrape(client: httpx.AsyncClient, domain: str) -> List[dict]:
+async def _html_fallback_scrape(client: httpx.AsyncClient, domain: str, limiter: HostLimiter) -> List[dict]:
     """
     Fallback scraping from homepage when RSS not available.
     This is best-effort and may include noise; adjust selectors per-site for better quality.
     """
     base_url = f"https://{domain}"
-    soup = await fetch_html(client, base_url)
-    if not soup:
+    async with limiter.slot(base_url):
+        tree = await fetch_tree(client, base_url)
+    if not tree:
         return []
 
-    cand = _html_candidate_links(soup, base_url)
+    cand = _html_candidate_links(tree, base_url)
     uniq = _unique_urls((u for (u, _t) in cand if u), domain, limit=25)
+    async def fetch_title(u: str) -> Tuple[str, Optional[LexborHTMLParser]]:
+        async with limiter.slot(u):
+            # og:title and <title> both live in <head>
+            return u, await fetch_tree(client, u, timeout=8.0, max_bytes=262144, stop_at=b"</head>")
+
+    results = await asyncio.gather(*(fetch_title(u) for u in uniq), return_exceptions=True)
+
     now = datetime.now(timezone.utc)
     items: List[dict] = []
-    for u in uniq:
+    for u, res in zip(uniq, results):
         title = None
         try:
-            page = await fetch_html(client, u, timeout=8.0)
+            page = None if isinstance(res, BaseException) else res[1]
             if page:
-                tnode = page.find("meta", property="og:title") or page.find("title")
+                tnode = page.css_first('meta[property="og:title"]') or page.css_first("title")
                 if tnode:
-                    title = clean_text(tnode.get("content") if tnode.has_attr("content") else tnode.get_text())
+                    attrs = tnode.attributes
+                    title = clean_text(attrs["content"] if "content" in attrs else tnode.text())
         except Exception:
             pass
 
@@ -276,8 +405,6 @@ async def _html_fallback_scrape(client: httpx.AsyncClient, domain: str) -> List[
         if not title:
             continue
 
-        summary = None
-
         items.append(
             {
                 "title": title,
@@ -293,21 +420,69 @@ async def _html_fallback_scrape(client: httpx.AsyncClient, domain: str) -> List[
     return items
 
 
-async def _crawl_domain(client: httpx.AsyncClient, domain: str) -> List[dict]:
+# feed url -> (ETag, Last-Modified) from the last fetch whose items were all upserted
+_feed_cache: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+_FEED_CONTENT_TYPES = ("xml", "rss", "atom")
+
+
+async def _is_feed(client: httpx.AsyncClient, url: str) -> bool:
+    """
+    Probe a guessed feed URL with HEAD before paying for a full GET.
+    Servers that reject HEAD are given the benefit of the doubt.
+    """
+    try:
+        r = await client.head(url, timeout=5.0)
+    except Exception:
+        return False
+    if r.status_code in (405, 501):
+        return True
+    content_type = r.headers.get("content-type", "").lower()
+    return r.status_code == 200 and any(t in content_type for t in _FEED_CONTENT_TYPES)
+
+
+async def _crawl_domain(
+    client: httpx.AsyncClient,
+    domain: str,
+    limiter: HostLimiter,
+) -> Tuple[List[dict], Dict[str, Tuple[Optional[str], Optional[str]]]]:
     """
     Crawl a single domain using RSS if possible; otherwise fallback to HTML heuristic scraping.
+    Returns the items and the validators of the feed they came from. The caller stores
+    the validators in _feed_cache only once the items are upserted.
     """
-    feeds = default_sources().get(domain, [])
+    feeds = default_sources().get(domain, ())
     tried: Set[str] = set()
+    validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
 
     async def try_feed(url: str) -> Optional[List[dict]]:
-        text = await fetch_text(client, url, timeout=15.0)
+        """
+        Return parsed items, [] if the feed is unchanged since the last crawl, or None on failure.
+        """
+        etag, last_modified = _feed_cache.get(url, (None, None))
+        conditional: Dict[str, str] = {}
+        if etag:
+            conditional["If-None-Match"] = etag
+        if last_modified:
+            conditional["If-Modified-Since"] = last_modified
+
+        async with limiter.slot(url):
+            text, headers, status = await fetch_text_with_headers(client, url, timeout=15.0, headers=conditional)
+        if status == 304:
+            logger.info("RSS %s not modified since last crawl", url)
+            return []
+        if status in (429, 503) and headers is not None:
+            retry_after = parse_retry_after(headers.get("retry-after"))
+            if retry_after:
+                logger.info("RSS %s asked to retry after %.0fs; backing off host", url, retry_after)
+                limiter.backoff(url, retry_after)
         if not text:
             return None
         try:
             items = await _parse_rss_content(text, source_domain=domain)
             if items:
                 logger.info("Parsed %d items from RSS %s", len(items), url)
+                validators[url] = (headers.get("etag"), headers.get("last-modified"))
             return items or None
         except Exception as e:
             logger.warning("RSS parse failed for %s: %s", url, e)
@@ -316,69 +491,102 @@ async def _crawl_domain(client: httpx.AsyncClient, domain: str) -> List[dict]:
     for f in feeds:
         tried.add(f)
         items = await try_feed(f)
-        if items:
-            return items
+        if items is not None:
+            return items, validators
 
     for f in _feed_guessers(domain):
         if f in tried:
             continue
+        async with limiter.slot(f):
+            is_feed = await _is_feed(client, f)
+        if not is_feed:
+            continue
         items = await try_feed(f)
-        if items:
-            return items
+        if items is not None:
+            return items, validators
 
     logger.info("Falling back to HTML scraping for %s", domain)
-    return await _html_fallback_scrape(client, domain)
+    return await _html_fallback_scrape(client, domain, limiter), {}
 
 
 async def crawl_sources(
     domains: Iterable[str],
     max_concurrent: int = 3,
+    max_total: int = MAX_TOTAL_REQUESTS,
 ) -> int:
     """
-    Crawl the given list of domains with bounded concurrency.
+    Crawl the given list of domains concurrently.
+    All domains progress at once; max_concurrent bounds in-flight requests per host,
+    and at most max_total are in flight overall.
     Upsert all discovered items into DB.
     Returns number of items processed (upserted).
     """
-    limiter = RateLimiter(max_concurrent=max_concurrent)
+    limiter = HostLimiter(per_host=max_concurrent, max_total=max_total, rate=HOST_RATE_LIMIT)
     count = 0
 
-    limits = httpx.Limits(max_keepalive_connections=max_concurrent, max_connections=max_concurrent * 2)
-    async with httpx.AsyncClient(timeout=20.0, limits=limits, headers={"User-Agent": "news-crawler/0.1"}) as client:
-        tasks = [limiter.run(_crawl_domain(client, d)) for d in domains]
-        for coro in asyncio.as_completed(tasks):
-            try:
-                items = await coro
-            except Exception as e:
-                logger.error("Domain crawl error: %s", e)
+    client = await get_client()
+
+    flush_threshold = 200  # Upsert once this many items are pending across domains
+    pending: List[dict] = []
+    pending_validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    seen_hashes: Set[str] = set()
+
+    async def flush(batch: List[dict], validators: Dict[str, Tuple[Optional[str], Optional[str]]]) -> int:
+        """
+        Upsert the batch, then remember the feed validators once every item is stored,
+        so a failed upsert is not hidden behind a 304 on the next crawl.
+        """
+        if not batch:
+            _feed_cache.update(validators)
+            return 0
+        try:
+            ids = await upsert_news_batch(batch)
+            _feed_cache.update(validators)
+            return len(ids)
+        except Exception as e:
+            logger.warning("Batch upsert failed, falling back to individual upserts: %s", e)
+            results = await asyncio.gather(*(upsert_news(it) for it in batch), return_exceptions=True)
+            upserted = 0
+            fails: List[Tuple[Optional[str], str]] = []
+            for item, res in zip(batch, results):
+                if not isinstance(res, Exception):
+                    upserted += 1
+                    continue
+                fails.append((item.get("url"), str(res)))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Upsert failed for %s: %s", item.get("url"), res)
+            if fails:
+                logger.warning("Upsert failed for %d items: sample=%s", len(fails), fails[:3])
+            else:
+                _feed_cache.update(validators)
+            return upserted
+
+    tasks = [asyncio.create_task(_crawl_domain(client, d, limiter)) for d in domains]
+    for coro in asyncio.as_completed(tasks):
+        try:
+            items, validators = await coro
+        except Exception as e:
+            logger.error("Domain crawl error: %s", e)
+            continue
+
+        for it in items:
+            # Skip items without a valid category and duplicates already seen this crawl
+            if not (it.get("category") or "").strip() or it["content_hash"] in seen_hashes:
                 continue
+            seen_hashes.add(it["content_hash"])
+            pending.append(it)
+        pending_validators.update(validators)
+        if len(pending) >= flush_threshold:
+            count += await flush(pending, pending_validators)
+            pending, pending_validators = [], {}
 
-            batch_size = 50  # Process up to 50 items at a time
-            for i in range(0, len(items), batch_size):
-                batch = items[i:i + batch_size]
-                # Filter out items without a valid category (skip inserting those)
-                batch = [it for it in batch if (it.get("category") or "").strip()]
-                
-                try:
-                    from app.db.crud import upsert_news_batch
-                    ids = await upsert_news_batch(batch)
-                    count += len(ids)
-                except Exception as e:
-                    logger.warning("Batch upsert failed, falling back to individual upserts: %s", e)
-                    for item in batch:
-                        # Skip items without category when falling back to individual upserts
-                        if not (item.get("category") or "").strip():
-                            continue
-                        try:
-                            await upsert_news(item)
-                            count += 1
-                        except Exception as individual_e:
-                            logger.warning("Upsert failed for %s: %s", item.get("url"), individual_e)
-                            continue
+    if pending or pending_validators:
+        count += await flush(pending, pending_validators)
 
     logger.info("Crawl completed. Processed %d items.", count)
     return count
 
 
-async def crawl_default_sources(max_concurrent: int = 3) -> int:
+async def crawl_default_sources(max_concurrent: int = 3, max_total: int = MAX_TOTAL_REQUESTS) -> int:
     domains = list(default_sources().keys())
-    return await crawl_sources(domains, max_concurrent=max_concurrent)
\ No newline at end of file
+    return await crawl_sources(domains, max_concurrent=max_concurrent, max_total=max_total)
\ No newline at end of file
@@ -1,16 +1,19 @@
 from __future__ import annotations
 
 import asyncio
+import calendar
+import functools
 import hashlib
 import re
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from html import unescape
-from time import mktime
-from typing import Optional
-from urllib.parse import urljoin, urlparse
+from typing import AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import urljoin, urlparse, urlsplit
 
 import httpx
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 
 
 USER_AGENT = (
@@ -20,12 +23,31 @@ USER_AGENT = (
 )
 
 
-def normalize_url(base_url: str, href: Optional[str]) -> Optional[str]:
-    if not href:
-        return None
-    href = href.strip()
-    if href.startswith("javascript:") or href.startswith("#"):
-        return None
+# Hrefs that never point at another page.
+_SKIP_PREFIXES = ("javascript:", "#")
+
+# Absolute http(s) URL with lowercase host and no fragment or whitespace.
+_NORMALIZED_RE = re.compile(r"^https?://[a-z0-9.\-]+(?::\d+)?(?:[/?][^\s#]*)?$")
+
+
+def _is_normalized(href: str) -> bool:
+    """
+    True if urljoin/urlparse would return href unchanged, so normalization can be skipped.
+    """
+    if not _NORMALIZED_RE.match(href) or href.endswith("?"):
+        return False
+    path = href.split("?", 1)[0]
+    return (
+        ";" not in path
+        and "/./" not in path
+        and "/../" not in path
+        and not path.endswith(("/.", "/.."))
+        and "//" not in path[8:]
+    )
+
+
+@functools.lru_cache(maxsize=65536)
+def _normalize_url_cached(base_url: str, href: str) -> Optional[str]:
     try:
         full = urljoin(base_url, href)
         parsed = urlparse(full)
@@ -35,9 +57,21 @@ def normalize_url(base_url: str, href: Optional[str]) -> Optional[str]:
         return None
 
 
+def normalize_url(base_url: str, href: Optional[str]) -> Optional[str]:
+    if not href:
+        return None
+    href = href.strip()
+    if href.startswith(_SKIP_PREFIXES):
+        return None
+    if _is_normalized(href):
+        return href
+    return _normalize_url_cached(base_url, href)
+
+
+@functools.lru_cache(maxsize=4096)
 def domain_from_url(url: str) -> str:
     try:
-        host = urlparse(url).netloc.lower()
+        host = urlsplit(url).netloc.lower()
         if host.startswith("www."):
             host = host[4:]
         return host
@@ -49,17 +83,28 @@ def clean_text(text: Optional[str]) -> Optional[str]:
     if text is None:
         return None
     s = unescape(text)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = " ".join(s.split())
     return s or None
 
 
+def html_to_text(text: Optional[str]) -> Optional[str]:
+    """
+    Flatten an HTML fragment, such as a feed description, into clean text.
+    """
+    if not text:
+        return None
+    if "<" in text:
+        text = LexborHTMLParser(text).text(separator=" ")
+    return clean_text(text)
+
+
 def compute_content_hash(*parts: Optional[str]) -> str:
-    m = hashlib.sha256()
+    buf = bytearray()
     for p in parts:
         if p:
-            m.update(p.encode("utf-8", errors="ignore"))
-            m.update(b"\x00")
-    return m.hexdigest()
+            buf += p.encode("utf-8", errors="ignore")
+            buf += b"\x00"
+    return hashlib.sha256(buf).hexdigest()
 
 
 def to_utc(dt: datetime) -> datetime:
@@ -68,59 +113,168 @@ def to_utc(dt: datetime) -> datetime:
     return dt.astimezone(timezone.utc)
 
 
+@functools.lru_cache(maxsize=4096)
+def _parse_date_string(val: str) -> Optional[datetime]:
+    try:
+        dt = datetime.fromisoformat(val.replace("Z", "+00:00"))
+        return to_utc(dt)
+    except Exception:
+        pass
+    try:
+        return to_utc(parsedate_to_datetime(val))
+    except Exception:
+        return None
+
+
 def parse_feed_datetime(entry: dict) -> Optional[datetime]:
     tm = entry.get("published_parsed") or entry.get("updated_parsed") or None
     if tm:
         try:
-            return datetime.fromtimestamp(mktime(tm), tz=timezone.utc)
+            # feedparser's *_parsed structs are already UTC
+            return datetime.fromtimestamp(calendar.timegm(tm), tz=timezone.utc)
         except Exception:
             pass
     for key in ("published", "updated", "date"):
         val = entry.get(key)
         if isinstance(val, str):
-            try:
-                dt = datetime.fromisoformat(val.replace("Z", "+00:00"))
-                return to_utc(dt)
-            except Exception:
-                continue
+            dt = _parse_date_string(val)
+            if dt:
+                return dt
     return None
 
 
-async def fetch_text(
+async def fetch_text_with_headers(
     client: httpx.AsyncClient,
     url: str,
     timeout: float = 15.0,
-) -> Optional[str]:
+    headers: Optional[Dict[str, str]] = None,
+) -> Tuple[Optional[str], Optional[httpx.Headers], int]:
+    """
+    Fetch a page as text and also return the response headers and status code.
+    A 304 Not Modified yields (None, headers, 304); transport errors yield (None, None, 0).
+    """
     try:
-        r = await client.get(url, timeout=timeout, headers={"User-Agent": USER_AGENT})
+        r = await client.get(url, timeout=timeout, headers={"User-Agent": USER_AGENT, **(headers or {})})
+        if r.status_code == 304:
+            return None, r.headers, 304
         r.raise_for_status()
-        return r.text
+        return r.text, r.headers, r.status_code
+    except httpx.HTTPStatusError as e:
+        return None, e.response.headers, e.response.status_code
     except Exception:
-        return None
+        return None, None, 0
+
+
+def parse_html(body: bytes, charset: Optional[str] = None) -> LexborHTMLParser:
+    """
+    Parse an HTML body with lexbor. A known charset wins; otherwise the raw bytes
+    go to the parser, which honours <meta charset>.
+    """
+    if charset:
+        return LexborHTMLParser(body.decode(charset, errors="replace"))
+    return LexborHTMLParser(body, encoding=True)
 
 
-async def fetch_html(
+async def fetch_tree(
     client: httpx.AsyncClient,
     url: str,
     timeout: float = 15.0,
-) -> Optional[BeautifulSoup]:
-    text = await fetch_text(client, url, timeout=timeout)
-    if text is None:
+    max_bytes: Optional[int] = None,
+    stop_at: Optional[bytes] = None,
+) -> Optional[LexborHTMLParser]:
+    """
+    Fetch a page and parse it with lexbor. A charset from the Content-Type header wins;
+    otherwise the raw bytes go to the parser, which honours <meta charset>.
+    The body is streamed: reading stops after max_bytes, or once the lowercase
+    marker stop_at (e.g. b"</head>") has arrived, and lexbor parses the prefix.
+    Parsing runs in a worker thread; lexbor releases the GIL while it builds the
+    tree, so large pages no longer stall the event loop.
+    """
+    try:
+        async with client.stream("GET", url, timeout=timeout, headers={"User-Agent": USER_AGENT}) as r:
+            r.raise_for_status()
+            body = bytearray()
+            async for chunk in r.aiter_bytes(65536):
+                scan_from = max(0, len(body) - len(stop_at)) if stop_at else 0
+                body += chunk
+                if max_bytes is not None and len(body) >= max_bytes:
+                    del body[max_bytes:]
+                    break
+                if stop_at and stop_at in body[scan_from:].lower():
+                    break
+            charset = r.charset_encoding
+        return await asyncio.to_thread(parse_html, bytes(body), charset)
+    except Exception:
         return None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header (delta-seconds or HTTP-date) into seconds from now.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
     try:
-        return BeautifulSoup(text, "lxml")
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
     except Exception:
         return None
 
 
-class RateLimiter:
+class HostLimiter:
     """
-    Simple asyncio semaphore-based rate limiter to constrain concurrency.
+    Rate limit requests per host with a token bucket, bound in-flight requests
+    per host and across all hosts, and honor Retry-After backoffs per host.
     """
 
-    def __init__(self, max_concurrent: int = 5):
-        self._sem = asyncio.Semaphore(max_concurrent)
+    def __init__(
+        self,
+        per_host: int = 2,
+        max_total: int = 20,
+        rate: float = 5.0,
+        max_backoff: float = 60.0,
+    ):
+        self._per_host = per_host
+        self._rate = rate  # tokens (requests) per second per host
+        self._max_backoff = max_backoff
+        self._host_sems: Dict[str, asyncio.Semaphore] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # host -> (tokens, last_refill)
+        self._blocked_until: Dict[str, float] = {}
+        self._global = asyncio.Semaphore(max_total)
+
+    async def _wait_for_token(self, host: str) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            blocked = self._blocked_until.get(host, 0.0) - now
+            if blocked > 0:
+                await asyncio.sleep(blocked)
+                continue
+            tokens, last = self._buckets.get(host, (float(self._per_host), now))
+            tokens = min(float(self._per_host), tokens + (now - last) * self._rate)
+            if tokens >= 1.0:
+                self._buckets[host] = (tokens - 1.0, now)
+                return
+            self._buckets[host] = (tokens, now)
+            await asyncio.sleep((1.0 - tokens) / self._rate)
+
+    def backoff(self, url: str, seconds: float) -> None:
+        """
+        Stop issuing requests to url's host for `seconds` (capped at max_backoff).
+        """
+        host = domain_from_url(url)
+        until = asyncio.get_running_loop().time() + min(seconds, self._max_backoff)
+        self._blocked_until[host] = max(self._blocked_until.get(host, 0.0), until)
 
-    async def run(self, coro):
-        async with self._sem:
-            return await coro
\ No newline at end of file
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        host = domain_from_url(url)
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = self._host_sems[host] = asyncio.Semaphore(self._per_host)
+        async with sem:
+            await self._wait_for_token(host)
+            async with self._global:
+                yield
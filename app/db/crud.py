@@ -1,15 +1,46 @@
 from __future__ import annotations
 
-from datetime import date, datetime
-from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
 from uuid import UUID
 
-from .database import fetch_all, fetch_one, upsert, delete
+import orjson
+from postgrest.types import CountMethod, ReturnMethod
+
+from .database import fetch_all, fetch_one, upsert, delete, rpc
 
 
 COLUMNS = "id, title, url, summary, source, category, publish_date, crawl_date, content_hash"
 
 
+def _search_filter(q: str) -> str:
+    """
+    Build a PostgREST `or` filter matching q case-insensitively in title or summary.
+    LIKE wildcards in q are escaped, and the pattern is quoted so commas and
+    parentheses in q cannot break the filter syntax. Served by the pg_trgm indexes.
+    """
+    pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    quoted = _quote(pattern)
+    return f"title.ilike.{quoted},summary.ilike.{quoted}"
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _after_filter(row: Dict[str, Any]) -> str:
+    """
+    Build a PostgREST `or` filter for the rows that come after row in the
+    (publish_date, crawl_date, id) descending order, with NULL publish dates first.
+    """
+    crawl, news_id = _quote(str(row["crawl_date"])), _quote(str(row["id"]))
+    tail = f"crawl_date.lt.{crawl},and(crawl_date.eq.{crawl},id.lt.{news_id})"
+    if row.get("publish_date") is None:
+        return f"publish_date.not.is.null,and(publish_date.is.null,or({tail}))"
+    publish = _quote(str(row["publish_date"]))
+    return f"publish_date.lt.{publish},and(publish_date.eq.{publish},or({tail}))"
+
+
 async def fetch_news(
     q: Optional[str] = None,
     category: Optional[str] = None,
@@ -18,9 +49,12 @@ async def fetch_news(
     to_date: Optional[date] = None,
     limit: int = 20,
     offset: int = 0,
+    after: Optional[Dict[str, Any]] = None,
 ) -> List[Dict[str, Any]]:
     """
-    Return a list of news rows as dicts with optional filters, ordered by publish_date then crawl_date.
+    Return a list of news rows as dicts with optional filters, ordered by publish_date
+    then crawl_date, with id breaking ties. Pass the last row of a previous page as
+    after to continue from it (keyset paging) instead of using offset.
     """
     from .database import get_supabase_client
     
@@ -35,27 +69,56 @@ async def fetch_news(
         query = query.gte("publish_date", from_date.isoformat())
     if to_date:
         query = query.lte("publish_date", to_date.isoformat())
+    if q:
+        query = query.or_(_search_filter(q))
+    if after:
+        query = query.or_(_after_filter(after))
     
-    query = query.order("publish_date", desc=True).order("crawl_date", desc=True)
+    query = query.order("publish_date", desc=True).order("crawl_date", desc=True).order("id", desc=True)
     
     if offset:
         query = query.range(offset, offset + limit - 1)
     else:
         query = query.limit(limit)
     
-    response = query.execute()
-    items = response.data
-    
-    if q:
-        filtered_items = []
-        q_lower = q.lower()
-        for item in items:
-            if (q_lower in (item.get("title", "") or "").lower() or 
-                q_lower in (item.get("summary", "") or "").lower()):
-                filtered_items.append(item)
-        items = filtered_items
-    
-    return items
+    response = await query.execute()
+    return response.data
+
+
+async def iter_news(
+    q: Optional[str] = None,
+    category: Optional[str] = None,
+    source: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    limit: int = 1000,
+    chunk_size: int = 500,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yield news rows matching the fetch_news filters in chunks of up to chunk_size,
+    stopping after limit rows, so large exports never hold the whole result in memory.
+    Each chunk continues after the last row of the one before (keyset paging), so rows
+    inserted during the export do not shift chunk boundaries.
+    """
+    sent = 0
+    after: Optional[Dict[str, Any]] = None
+    while sent < limit:
+        rows = await fetch_news(
+            q=q,
+            category=category,
+            source=source,
+            from_date=from_date,
+            to_date=to_date,
+            limit=min(chunk_size, limit - sent),
+            after=after,
+        )
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        sent += len(rows)
+        after = rows[-1]
 
 
 async def count_news(
@@ -81,30 +144,14 @@ async def count_news(
         query = query.gte("publish_date", from_date.isoformat())
     if to_date:
         query = query.lte("publish_date", to_date.isoformat())
+    if q:
+        query = query.or_(_search_filter(q))
 
-    response = query.execute()
-
-    items = response.data or []
-
-    total_count = response.count if hasattr(response, "count") and response.count is not None else len(items)
+    # The exact count comes back in Content-Range regardless of the row limit,
+    # so only fetch a single id instead of every matching row.
+    response = await query.limit(1).execute()
 
-    if q:
-        filtered_items = []
-        q_lower = q.lower()
-        for item in items:
-            full_item = await fetch_one(
-                table="news",
-                filters={"id": item["id"]},
-                select=COLUMNS,
-            )
-            if full_item and (
-                q_lower in (full_item.get("title", "") or "").lower()
-                or q_lower in (full_item.get("summary", "") or "").lower()
-            ):
-                filtered_items.append(item)
-        return len(filtered_items)
-
-    return total_count
+    return response.count or 0
 
 
 async def fetch_news_by_id(news_id: UUID) -> Optional[Dict[str, Any]]:
@@ -120,7 +167,7 @@ async def fetch_news_by_id(news_id: UUID) -> Optional[Dict[str, Any]]:
 
 async def upsert_news(item: Dict[str, Any]) -> str:
     """
-    Insert or update a news row by unique URL constraint.
+    Insert or update a news row by its canonical URL (`url_canon`, see README).
     Expects keys: url (str), title (str), summary (str|None), source (str),
                   category (str|None), publish_date (datetime|None),
                   crawl_date (datetime), content_hash (str|None)
@@ -132,29 +179,25 @@ async def upsert_news(item: Dict[str, Any]) -> str:
     
     result = await upsert(
         table="news",
-        data=item
+        data=item,
+        on_conflict="url_canon"
     )
     return result.get("id", "")
 
 
 async def upsert_news_batch(items: List[Dict[str, Any]]) -> List[str]:
     """
-    Batch insert or update multiple news rows by unique URL constraint.
-    This is more efficient for processing many items at once.
-    Returns the list of IDs of the inserted/updated rows.
+    Batch insert or update multiple news rows by canonical URL.
+    Runs the `upsert_news_batch` Postgres function (see README) so the whole batch
+    is one INSERT ... ON CONFLICT (url_canon) DO UPDATE in a single round-trip.
+    Returns the list of IDs of the inserted/changed rows.
     """
-    for item in items:
-        for key in ['publish_date', 'crawl_date']:
-            if key in item and item[key] is not None and not isinstance(item[key], str):
-                item[key] = item[key].isoformat()
+    # orjson renders datetimes as ISO 8601 in C; Postgres casts them to timestamptz
+    payload = orjson.loads(orjson.dumps(items))
     
-    results = await upsert(
-        table="news",
-        data=items
-    )
+    results = await rpc("upsert_news_batch", {"items": payload})
     
-    ids = [item.get("id", "") for item in results]
-    return ids
+    return [str(item_id) for item_id in (results or [])]
 
 
 async def delete_older_than(days: int = 30, by_publish_date: bool = False) -> int:
@@ -164,18 +207,21 @@ async def delete_older_than(days: int = 30, by_publish_date: bool = False) -> in
     - Else compare crawl_date
     Returns deleted rows count.
     """
-    
-    if by_publish_date:
-        filters = {"publish_date.lt": f"now()-{days}days"}
-    else:
-        filters = {"crawl_date.lt": f"now()-{days}days"}
-    
-    deleted_items = await delete(
-        table="news",
-        filters=filters
+    from .database import get_supabase_client
+
+    column = "publish_date" if by_publish_date else "crawl_date"
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+    client = await get_supabase_client()
+    response = await (
+        client.table("news")
+        .delete(count=CountMethod.exact, returning=ReturnMethod.minimal)
+        .lt(column, cutoff)
+        .execute()
     )
-    
-    return len(deleted_items)
+    return response.count or 0
+
+
 async def delete_placeholder_summaries(placeholder: str = "No content available for summarization") -> int:
     """
     Delete news rows whose summary equals the given placeholder string.
@@ -191,10 +237,10 @@ async def delete_category_null() -> int:
     Delete news rows where category is NULL.
     Returns the count of deleted rows.
     """
-    from .database import _get_supabase_client
-    client = _get_supabase_client()
+    from .database import get_supabase_client
+    client = await get_supabase_client()
     builder = client.table("news").delete()
     # Use IS filter to match NULL category
     builder = builder.is_("category", None)
-    response = builder.execute()
+    response = await builder.execute()
     return len(response.data or [])
\ No newline at end of file
@@ -1,18 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import os
 from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import acreate_client, AClient
 
 load_dotenv()
 
-_supabase: Optional[Client] = None
+_supabase: Optional[AClient] = None
+_supabase_lock = asyncio.Lock()
 
 
-def _get_supabase_client() -> Client:
+async def get_supabase_client() -> AClient:
     """
-    Create and return a Supabase client.
+    Create and return the async Supabase client.
+    Queries are awaited over httpx instead of blocking the event loop.
     Raises RuntimeError if required environment variables are missing.
     """
     global _supabase
@@ -25,17 +28,12 @@ def _get_supabase_client() -> Client:
     if not url or not key:
         raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be configured")
 
-    _supabase = create_client(url, key)
+    async with _supabase_lock:
+        if _supabase is None:
+            _supabase = await acreate_client(url, key)
     return _supabase
 
 
-async def get_supabase_client() -> Client:
-    """
-    Return the Supabase client.
-    """
-    return _get_supabase_client()
-
-
 async def close_client() -> None:
     """
     Close the Supabase client connection.
@@ -51,7 +49,7 @@ async def fetch_all(table: str, filters: Optional[Dict[str, Any]] = None,
     """
     Fetch all records from a table with optional filters.
     """
-    client = _get_supabase_client()
+    client = await get_supabase_client()
     query = client.table(table).select(select)
     
     if filters:
@@ -67,7 +65,7 @@ async def fetch_all(table: str, filters: Optional[Dict[str, Any]] = None,
     if offset:
         query = query.range(offset, offset + limit - 1 if limit else offset)
     
-    response = query.execute()
+    response = await query.execute()
     return response.data
 
 
@@ -75,13 +73,13 @@ async def fetch_one(table: str, filters: Dict[str, Any], select: str = "*") -> O
     """
     Fetch a single record from a table with filters.
     """
-    client = _get_supabase_client()
+    client = await get_supabase_client()
     query = client.table(table).select(select)
     
     for key, value in filters.items():
         query = query.eq(key, value)
     
-    response = query.limit(1).execute()
+    response = await query.limit(1).execute()
     return response.data[0] if response.data else None
 
 
@@ -89,17 +87,18 @@ async def insert(table: str, data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Insert a record into a table.
     """
-    client = _get_supabase_client()
-    response = client.table(table).insert(data).execute()
+    client = await get_supabase_client()
+    response = await client.table(table).insert(data).execute()
     return response.data[0] if response.data else {}
 
 
-async def upsert(table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+async def upsert(table: str, data: Dict[str, Any], on_conflict: str = "") -> Dict[str, Any]:
     """
     Upsert a record into a table.
+    on_conflict names the unique column(s) to resolve against (default: primary key).
     """
-    client = _get_supabase_client()
-    response = client.table(table).upsert(data).execute()
+    client = await get_supabase_client()
+    response = await client.table(table).upsert(data, on_conflict=on_conflict).execute()
     return response.data[0] if response.data else {}
 
 
@@ -107,13 +106,13 @@ async def update(table: str, filters: Dict[str, Any], data: Dict[str, Any]) -> L
     """
     Update records in a table with filters.
     """
-    client = _get_supabase_client()
+    client = await get_supabase_client()
     builder = client.table(table).update(data)
 
     for key, value in filters.items():
         builder = builder.eq(key, value)
 
-    response = builder.execute()
+    response = await builder.execute()
     return response.data
 
 
@@ -121,11 +120,20 @@ async def delete(table: str, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Delete records from a table with filters.
     """
-    client = _get_supabase_client()
+    client = await get_supabase_client()
     builder = client.table(table).delete()
 
     for key, value in filters.items():
         builder = builder.eq(key, value)
 
-    response = builder.execute()
-    return response.data
\ No newline at end of file
+    response = await builder.execute()
+    return response.data
+
+
+async def rpc(function: str, params: Dict[str, Any]) -> Any:
+    """
+    Call a Postgres function through PostgREST and return its result.
+    """
+    client = await get_supabase_client()
+    response = await client.rpc(function, params).execute()
+    return response.data
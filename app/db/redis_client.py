@@ -1,111 +1,122 @@
 from __future__ import annotations
 
 import os
-import asyncio
-from typing import Optional
-from redis.asyncio import Redis
+from typing import Mapping, Optional
+from redis.asyncio import BlockingConnectionPool, Redis
 from dotenv import load_dotenv
 
 load_dotenv()
 
+REDIS_MAX_CONNECTIONS = int(os.environ.get("REDIS_MAX_CONNECTIONS", "50"))
+
+_redis_pool: Optional[BlockingConnectionPool] = None
 _redis_client: Optional[Redis] = None
-_redis_loop: Optional[asyncio.AbstractEventLoop] = None
 
 
-def _get_redis_client() -> Redis:
+def _redis_url() -> str:
     """
-    Create and return a Redis client.
+    Build the Redis URL from the environment.
     For local development, uses REDIS_URL (default: redis://localhost:6379)
     For Redis Cloud, uses REDIS_HOST, REDIS_PORT, and REDIS_PASSWORD
     """
-    global _redis_client
-    if _redis_client is not None:
-        return _redis_client
-
     redis_host = os.environ.get("REDIS_HOST")
     redis_port = os.environ.get("REDIS_PORT")
     redis_password = os.environ.get("REDIS_PASSWORD")
-    
+
     if redis_host and redis_port:
         if redis_password:
-            redis_url = f"rediss://:{redis_password}@{redis_host}:{redis_port}"
-        else:
-            redis_url = f"rediss://{redis_host}:{redis_port}"
-    else:
-        redis_url = os.environ.get("REDIS_URL", "redis://localhost:6379")
-    
-    _redis_client = Redis.from_url(
-        redis_url, 
-        decode_responses=True, 
-        health_check_interval=30,
-        socket_connect_timeout=5,
-        socket_timeout=5,
-        retry_on_timeout=True
-    )
-    return _redis_client
+            return f"rediss://:{redis_password}@{redis_host}:{redis_port}"
+        return f"rediss://{redis_host}:{redis_port}"
+    return os.environ.get("REDIS_URL", "redis://localhost:6379")
 
 
-async def get_redis_client() -> Redis:
+def _get_redis_client() -> Redis:
     """
-    Return a Redis client bound to the current event loop.
-    Recreates the client if called from a different loop to avoid 'Future attached to a different loop'.
+    Create and return a Redis client backed by a single shared connection pool.
+    The pool blocks for a free connection instead of failing once
+    REDIS_MAX_CONNECTIONS are in use.
     """
-    global _redis_client, _redis_loop
-
-    try:
-        current_loop = asyncio.get_running_loop()
-    except RuntimeError:
-        # Fallback if not in an async context
-        current_loop = asyncio.get_event_loop()
-
-    if _redis_client is not None and _redis_loop is current_loop:
+    global _redis_pool, _redis_client
+    if _redis_client is not None:
         return _redis_client
 
-    # Close previous client if loop changed
-    if _redis_client is not None and _redis_loop is not current_loop:
-        try:
-            await _redis_client.close()
-        except Exception:
-            pass
-        _redis_client = None
-
-    redis_host = os.environ.get("REDIS_HOST")
-    redis_port = os.environ.get("REDIS_PORT")
-    redis_password = os.environ.get("REDIS_PASSWORD")
-    
-    if redis_host and redis_port:
-        if redis_password:
-            redis_url = f"rediss://:{redis_password}@{redis_host}:{redis_port}"
-        else:
-            redis_url = f"rediss://{redis_host}:{redis_port}"
-    else:
-        redis_url = os.environ.get("REDIS_URL", "redis://localhost:6379")
-    
-    _redis_client = Redis.from_url(
-        redis_url,
-        decode_responses=True,
-        health_check_interval=30,
-        socket_connect_timeout=5,
-        socket_timeout=5,
-        retry_on_timeout=True
-    )
-    _redis_loop = current_loop
+    if _redis_pool is None:
+        _redis_pool = BlockingConnectionPool.from_url(
+            _redis_url(),
+            max_connections=REDIS_MAX_CONNECTIONS,
+            decode_responses=True,
+            health_check_interval=30,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+            retry_on_timeout=True
+        )
+    _redis_client = Redis(connection_pool=_redis_pool)
     return _redis_client
 
 
+async def get_redis_client() -> Redis:
+    """
+    Return the shared Redis client.
+    """
+    return _redis_client or _get_redis_client()
+
+
 async def close_redis_client() -> None:
     """
-    Close the Redis client connection.
+    Close the Redis client and disconnect its connection pool.
     """
-    global _redis_client, _redis_loop
+    global _redis_pool, _redis_client
     if _redis_client is not None:
         try:
             await _redis_client.close()
         except Exception:
             pass
         _redis_client = None
-    _redis_loop = None
+    if _redis_pool is not None:
+        try:
+            await _redis_pool.disconnect()
+        except Exception:
+            pass
+        _redis_pool = None
 
 
 NEWS_SUMMARIZATION_QUEUE = "news_summarization_queue"
-FAILED_SUMMARIZATION_QUEUE = "failed_summarization_queue"
\ No newline at end of file
+FAILED_SUMMARIZATION_QUEUE = "failed_summarization_queue"
+
+ENQUEUE_CHUNK_SIZE = 1000
+
+
+async def enqueue_many(
+    scores: Mapping[str, float],
+    queue: str = NEWS_SUMMARIZATION_QUEUE,
+    nx: bool = False,
+) -> int:
+    """
+    Add many items to a priority queue in a single round trip.
+    Large batches are split into ZADD chunks sent through one pipeline.
+    With nx=True, members already in the queue keep their current score.
+    Returns the number of newly added members.
+    """
+    if not scores:
+        return 0
+
+    client = await get_redis_client()
+    items = list(scores.items())
+    async with client.pipeline(transaction=False) as pipe:
+        for start in range(0, len(items), ENQUEUE_CHUNK_SIZE):
+            pipe.zadd(queue, dict(items[start:start + ENQUEUE_CHUNK_SIZE]), nx=nx)
+        results = await pipe.execute()
+    return sum(results)
+
+
+NEWS_LIST_CACHE_TTL = int(os.environ.get("NEWS_LIST_CACHE_TTL", "30"))  # Seconds to cache /api/news pages
+NEWS_VERSION_KEY = "news:version"
+
+
+async def bump_news_version() -> None:
+    """
+    Invalidate cached /api/news pages. The version is part of every cache key,
+    so bumping it makes readers miss and rebuild; old entries expire on their TTL.
+    """
+    client = await get_redis_client()
+    await client.incr(NEWS_VERSION_KEY)
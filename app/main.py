@@ -1,15 +1,84 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import ORJSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+import asyncio
 import logging
+import os
+import time
+
+import orjson
 
 __version__ = "0.1.0"
 
+logger = logging.getLogger("uvicorn.error")
+
+
+async def _warm_clients() -> None:
+    """
+    Create the Supabase, Redis and crawler HTTP clients concurrently.
+    Failures are logged and left for the first request to surface.
+    """
+    from app.crawler.spider import get_client as get_http_client
+    from app.db.database import get_supabase_client
+    from app.db.redis_client import get_redis_client
+
+    results = await asyncio.gather(
+        get_supabase_client(),
+        get_redis_client(),
+        get_http_client(),
+        return_exceptions=True,
+    )
+    for name, result in zip(("Supabase", "Redis", "HTTP"), results):
+        if isinstance(result, Exception):
+            logger.info("%s client not initialized: %s", name, result)
+
+
+async def _close_clients() -> None:
+    """
+    Close every shared client, ignoring errors on the way out.
+    """
+    from app.crawler.spider import close_client as close_http_client
+    from app.db.database import close_client
+    from app.db.redis_client import close_redis_client
+    from app.utils.content_extractor import close_client as close_extractor_client
+
+    await asyncio.gather(
+        close_client(),
+        close_redis_client(),
+        close_http_client(),
+        close_extractor_client(),
+        return_exceptions=True,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await _warm_clients()
+
+    tasks = []
+    if (os.getenv("RAILWAY") or os.getenv("RENDER")) and os.getenv("STARTUP_TASK") == "cron":
+        from app.startup import run_crawl_cron
+
+        logger.info("Starting internal crawl scheduler for Railway/Render deployment")
+        tasks.append(asyncio.create_task(run_crawl_cron()))
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await _close_clients()
+    logger.info("Application shutting down")
+
+
 app = FastAPI(
     title="News Crawler Backend",
     version=__version__,
     default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -19,64 +88,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-logger = logging.getLogger("uvicorn.error")
-
-try:
-    from app.db.database import get_supabase_client, close_client  # type: ignore
-
-    import os
-    platform = os.getenv("PLATFORM", os.getenv("RAILWAY", "default"))
-    
-    if platform == "RAILWAY":
-        from app.startup import lifespan
-        app.router.lifespan_context = lifespan
-    elif platform == "HUGGINGFACE_SPACES":
-        @app.on_event("startup")
-        async def _startup():
-            try:
-                await get_supabase_client()
-                logger.info("Supabase client initialized for Hugging Face Spaces")
-            except Exception as e:
-                logger.info("Supabase client not initialized: %s", e)
-
-        @app.on_event("shutdown")
-        async def _shutdown():
-            try:
-                await close_client()
-                logger.info("Supabase client closed for Hugging Face Spaces")
-            except Exception:
-                pass
-    else:
-        @app.on_event("startup")
-        async def _startup():
-            try:
-                await get_supabase_client()
-            except Exception as e:
-                logger.info("Supabase client not initialized: %s", e)
-
-        @app.on_event("shutdown")
-        async def _shutdown():
-            try:
-                await close_client()
-            except Exception:
-                pass
-except ImportError:
-    @app.on_event("startup")
-    async def _startup():
-        try:
-            await get_supabase_client()
-        except Exception as e:
-            logger.info("Supabase client not initialized: %s", e)
-
-    @app.on_event("shutdown")
-    async def _shutdown():
-        try:
-            await close_client()
-        except Exception:
-            pass
-except Exception as e:
-    logger.info("Database module not available yet: %s", e)
+# News lists are repetitive JSON text; small bodies like /health stay uncompressed
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 @app.get("/")
 async def root():
@@ -86,12 +99,18 @@ async def root():
         "version": __version__,
     }
 
+_health_body = (0, b"")  # (unix second, encoded response) reused within the same second
+
 @app.get("/health")
 async def health():
-    return {
-        "status": "healthy",
-        "time": datetime.now(timezone.utc).isoformat(),
-    }
+    global _health_body
+    now = int(time.time())
+    if now != _health_body[0]:
+        _health_body = (now, orjson.dumps({
+            "status": "healthy",
+            "time": datetime.fromtimestamp(now, timezone.utc).isoformat(),
+        }))
+    return Response(content=_health_body[1], media_type="application/json")
 
 try:
     from app.api.routes import router as api_router  # type: ignore
@@ -100,16 +119,38 @@ except Exception as e:
     logger.info("API router not loaded yet: %s", e)
 
 
+_crawl_lock = asyncio.Lock()
+_background_tasks = set()
+
+
+async def _run_crawl_with_lock() -> None:
+    """
+    Run the crawl job and release the lock taken by the trigger endpoint.
+    """
+    from app.scheduler import run_crawl_job
+
+    try:
+        count = await run_crawl_job(max_concurrent=3, domains=None)
+        logger.info(f"Triggered crawl job completed, upserted {count} items")
+    except Exception as e:
+        logger.error(f"Error in triggered crawl job: {e}")
+    finally:
+        _crawl_lock.release()
+
+
 @app.post("/trigger-crawl")
 async def trigger_crawl_endpoint():
     """
     Endpoint that can be triggered by external services to start crawling.
     Works with Render, Hugging Face Spaces, and other platforms.
+    The crawl runs in the background; overlapping triggers are rejected as busy.
     """
-    try:
-        from app.scheduler import run_crawl_job
-        count = await run_crawl_job(max_concurrent=3, domains=None)
-        return {"status": "ok", "message": f"Triggered crawl job, upserted {count} items", "upserted": count}
-    except Exception as e:
-        logger.error(f"Error in trigger crawl endpoint: {e}")
-        return {"status": "error", "message": str(e)}
+    if _crawl_lock.locked():
+        return {"status": "busy", "message": "A crawl job is already running"}
+
+    # Taken here, not in the task, so a second trigger in the same tick sees it
+    await _crawl_lock.acquire()
+    task = asyncio.create_task(_run_crawl_with_lock())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return {"status": "started", "message": "Triggered crawl job"}
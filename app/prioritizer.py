@@ -2,14 +2,27 @@ from __future__ import annotations
 
 import logging
 import asyncio
+import re
 from typing import Dict, List, Optional
 from uuid import UUID
 
+from postgrest.exceptions import APIError
+
 from app.db.database import get_supabase_client
-from app.db.redis_client import get_redis_client, NEWS_SUMMARIZATION_QUEUE
+from app.db.redis_client import enqueue_many
 
 logger = logging.getLogger(__name__)
 
+PAGE_SIZE = 1000  # Unsummarized rows fetched per request
+DELETE_CHUNK_SIZE = 200  # Ids per DELETE, keeping the in.(...) filter well under URL limits
+
+# Rows carry a database-computed priority_score once the news_priority column from
+# the README exists; otherwise the fields calculate_priority_score needs are fetched.
+_SCORED_COLUMNS = "id, category, priority_score"
+_UNSCORED_COLUMNS = "id, title, source, category, publish_date"
+# Postgres undefined_column, and PostgREST's unknown-column code
+_MISSING_COLUMN_CODES = {"42703", "PGRST204"}
+
 SOURCE_SCORES = {
     'kompas.com': 20,
     'detik.com': 20,
@@ -36,7 +49,6 @@ KEYWORD_SCORES = {
     'internasional': 8,
     'politik': 10,
     'bisnis': 8,
-    'olahraga': 5,
     'pendidikan': 5,
     'kriminal': 8,
     'cuaca': 3,
@@ -45,18 +57,23 @@ KEYWORD_SCORES = {
     'vaksin': 10,
 }
 
+# One alternation over the source domains, so a single C-level scan replaces a
+# substring check per domain. re.search would return the leftmost domain, not the
+# best-scoring one; inside a lookahead, finditer reports a domain at every position
+# and the highest score wins, like the max() in the README's news_priority.
+_SOURCE_RE = re.compile("(?=(" + "|".join(
+    re.escape(src) for src in sorted(SOURCE_SCORES, key=SOURCE_SCORES.get, reverse=True)
+) + "))")
 
-async def calculate_priority_score(title: str, source: str, publish_date: Optional[str] = None) -> int:
+
+def calculate_priority_score(title: str, source: str, publish_date: Optional[str] = None) -> int:
     """
     Calculate priority score for a news item based on source, title keywords, and publish date.
+    The news_priority SQL function in the README mirrors this; keep the two in sync.
     """
     score = 0
 
-    source_lower = source.lower()
-    for src, src_score in SOURCE_SCORES.items():
-        if src in source_lower:
-            score += src_score
-            break
+    score += max((SOURCE_SCORES[m.group(1)] for m in _SOURCE_RE.finditer(source.lower())), default=0)
 
     title_lower = title.lower()
     for keyword, keyword_score in KEYWORD_SCORES.items():
@@ -69,54 +86,107 @@ async def calculate_priority_score(title: str, source: str, publish_date: Option
     return score
 
 
+async def _prioritize_page(supabase, items: List[dict]) -> int:
+    """
+    Score one page of unsummarized news items, delete the uncategorized ones,
+    and queue the rest. Returns the number of items newly added to the queue.
+    """
+    scores: Dict[str, int] = {}
+    uncategorized: List[str] = []
+    
+    for item in items:
+        try:
+            if not item.get('category'):
+                uncategorized.append(item['id'])
+                continue
+
+            score = item.get('priority_score')
+            if score is None:
+                score = calculate_priority_score(
+                    title=item['title'],
+                    source=item['source'],
+                    publish_date=item.get('publish_date')
+                )
+            
+            scores[item['id']] = score
+            logger.debug(f"Queued news item {item['id']} with score {score}")
+            
+        except Exception as e:
+            logger.error(f"Error processing news item {item.get('id', 'unknown')}: {e}")
+            continue
+    
+    for start in range(0, len(uncategorized), DELETE_CHUNK_SIZE):
+        chunk = uncategorized[start:start + DELETE_CHUNK_SIZE]
+        try:
+            await supabase.table("news").delete().in_("id", chunk).execute()
+            logger.info(f"Deleted {len(chunk)} news items due to missing category")
+        except Exception as e:
+            logger.error(f"Failed to delete {len(chunk)} items with missing category: {e}")
+    
+    # NX: items still queued from an earlier run keep their place (and any retry penalty)
+    added = await enqueue_many(scores, nx=True)
+    if added < len(scores):
+        logger.debug(f"{len(scores) - added} news items were already queued")
+    return added
+
+
 async def prioritize_news() -> int:
     """
     Fetch news items with NULL summaries from Supabase, calculate priority scores,
     and add them to the Redis priority queue.
+    Rows are read PAGE_SIZE at a time in id order (keyset pagination, so deleting
+    uncategorized rows never shifts a page), and each page is queued before the next
+    is fetched. Scores come from the priority_score column when the database has it
+    (see README), and are computed here otherwise.
     
     Returns the number of items added to the queue.
     """
     logger.info("Starting prioritization process...")
     
     supabase = await get_supabase_client()
-    redis_client = await get_redis_client()
-    
-    query_result = supabase.table("news").select("id, title, source, category, publish_date").is_("summary", "null").execute()
-    items = query_result.data or []
-    
-    if not items:
-        logger.info("No news items to prioritize")
-        return 0
-
-    logger.info(f"Found {len(items)} news items to prioritize")
     
+    seen = 0
     prioritized_count = 0
-    
-    for item in items:
+    last_id: Optional[str] = None
+    columns = _SCORED_COLUMNS
+    while True:
+        query = (
+            supabase.table("news")
+            .select(columns)
+            .is_("summary", "null")
+            .order("id")
+            .limit(PAGE_SIZE)
+        )
+        if last_id is not None:
+            query = query.gt("id", last_id)
         try:
-            if not item.get('category'):
-                try:
-                    supabase.table("news").delete().eq("id", item['id']).execute()
-                    logger.info(f"Deleted news item {item['id']} due to missing category")
-                except Exception as e:
-                    logger.error(f"Failed to delete item {item.get('id', 'unknown')} with missing category: {e}")
-                continue
+            items = (await query.execute()).data or []
+        except APIError as e:
+            if columns == _UNSCORED_COLUMNS or e.code not in _MISSING_COLUMN_CODES:
+                raise
+            logger.info(f"priority_score column unavailable, scoring in Python: {e}")
+            columns = _UNSCORED_COLUMNS
+            continue
+        
+        if not items:
+            break
 
-            score = await calculate_priority_score(
-                title=item['title'],
-                source=item['source'],
-                publish_date=item.get('publish_date')
-            )
-            
-            await redis_client.zadd(NEWS_SUMMARIZATION_QUEUE, {item['id']: score})
-            logger.debug(f"Added news item {item['id']} to queue with score {score}")
-            
-            prioritized_count += 1
-            
+        seen += len(items)
+        logger.info(f"Found {len(items)} news items to prioritize")
+        
+        try:
+            prioritized_count += await _prioritize_page(supabase, items)
         except Exception as e:
-            logger.error(f"Error processing news item {item.get('id', 'unknown')}: {e}")
-            continue
-    
+            logger.error(f"Failed to add {len(items)} items to queue: {e}")
+            break
+        
+        if len(items) < PAGE_SIZE:
+            break
+        last_id = items[-1]['id']
+
+    if not seen:
+        logger.info("No news items to prioritize")
+        return 0
+
     logger.info(f"Prioritization completed. Added {prioritized_count} items to queue.")
     return prioritized_count
-
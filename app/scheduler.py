@@ -1,30 +1,81 @@
 from __future__ import annotations
 
+import argparse
 import asyncio
 import logging
-from typing import List, Optional
+from typing import List, Optional, Set
 
-from app.crawler.spider import crawl_default_sources, crawl_sources
+from app.crawler.spider import MAX_TOTAL_REQUESTS, crawl_default_sources, crawl_sources
+from app.db.redis_client import bump_news_version
 from app.prioritizer import prioritize_news
 from app.workers.summarizer_worker import SummarizerWorker
 
 logger = logging.getLogger(__name__)
 
 
-async def run_crawl_job(max_concurrent: int = 3, domains: Optional[List[str]] = None) -> int:
+async def _invalidate_news_cache() -> None:
+    try:
+        await bump_news_version()
+    except Exception as e:
+        logger.warning("Failed to invalidate cached news lists: %s", e)
+
+
+_prioritize_lock = asyncio.Lock()
+_prioritize_pending = False
+_background_tasks: Set[asyncio.Task] = set()
+
+
+async def _prioritize_in_background() -> None:
+    global _prioritize_pending
+    async with _prioritize_lock:
+        # Cleared once the pass starts, so a crawl finishing mid-pass queues one more
+        _prioritize_pending = False
+        try:
+            count = await prioritize_news()
+            logger.info("Background prioritizer queued %d items", count)
+        except Exception as e:
+            logger.error("Background prioritizer failed: %s", e)
+
+
+def schedule_prioritizer() -> None:
+    """
+    Run the prioritizer in a background task, one pass at a time.
+    Requests made while a pass is already waiting to start are merged into it.
+    """
+    global _prioritize_pending
+    if _prioritize_pending:
+        return
+    _prioritize_pending = True
+    task = asyncio.create_task(_prioritize_in_background())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def run_crawl_job(
+    max_concurrent: int = 3,
+    domains: Optional[List[str]] = None,
+    max_total: int = MAX_TOTAL_REQUESTS,
+) -> int:
     """
     Run the crawl job against default sources or a provided list of domains.
+    max_concurrent bounds in-flight requests per host, max_total across all hosts.
+    Prioritization of the new rows is scheduled in the background rather than awaited.
     Returns the number of items upserted.
     """
     if domains:
-        logger.info("Starting crawl job for domains=%s with concurrency=%d", domains, max_concurrent)
-        count = await crawl_sources(domains, max_concurrent=max_concurrent)
+        logger.info(
+            "Starting crawl job for domains=%s with concurrency=%d per host, %d total",
+            domains, max_concurrent, max_total,
+        )
+        count = await crawl_sources(domains, max_concurrent=max_concurrent, max_total=max_total)
     else:
-        logger.info("Starting crawl job for default sources with concurrency=%d", max_concurrent)
-        count = await crawl_default_sources(max_concurrent=max_concurrent)
+        logger.info(
+            "Starting crawl job for default sources with concurrency=%d per host, %d total",
+            max_concurrent, max_total,
+        )
+        count = await crawl_default_sources(max_concurrent=max_concurrent, max_total=max_total)
     
-    logger.info("Running prioritizer after crawl...")
-    await prioritize_news()
+    schedule_prioritizer()
     # Ensure any rows with NULL category are removed immediately after crawl
     try:
         from app.db.crud import delete_category_null  # type: ignore
@@ -33,6 +84,7 @@ async def run_crawl_job(max_concurrent: int = 3, domains: Optional[List[str]] =
     except Exception as e:
         logger.warning("Failed to delete rows with NULL category after crawl: %s", e)
     
+    await _invalidate_news_cache()
     return count
 
 
@@ -44,7 +96,8 @@ async def run_prioritizer() -> int:
     Returns the number of items added to the queue.
     """
     logger.info("Starting prioritizer job...")
-    return await prioritize_news()
+    async with _prioritize_lock:
+        return await prioritize_news()
 
 
 async def run_summarizer(max_concurrent: int = 1, batch_mode: bool = True) -> int:
@@ -81,6 +134,79 @@ async def run_cleanup_job(days: int = 30, by_publish_date: bool = False) -> int:
     
     deleted = await delete_older_than(days=days, by_publish_date=by_publish_date)
     logger.info("Cleanup job completed: deleted=%d", deleted)
+    if deleted:
+        await _invalidate_news_cache()
     return deleted
 
 
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.scheduler", description="Run news crawler jobs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    crawl = commands.add_parser("crawl", help="Crawl default sources or the given domains")
+    crawl.add_argument("--concurrency", type=int, default=3, help="Max concurrent requests per host")
+    crawl.add_argument("--domains", help="Comma-separated domain list to crawl (overrides defaults)")
+
+    commands.add_parser("prioritize", help="Score and queue unsummarized news")
+
+    summarize = commands.add_parser("summarize", help="Summarize queued news")
+    summarize.add_argument("--concurrency", type=int, default=1, help="Max concurrent summarization tasks")
+    mode = summarize.add_mutually_exclusive_group()
+    mode.add_argument("--batch", dest="batch", action="store_true", default=True, help="Process one batch and exit (default)")
+    mode.add_argument("--continuous", dest="batch", action="store_false", help="Keep processing the queue")
+
+    cleanup = commands.add_parser("cleanup", help="Delete old news")
+    cleanup.add_argument("--days", type=int, default=30, help="Delete items older than N days")
+    cleanup.add_argument("--by-publish", action="store_true", help="Compare by publish_date instead of crawl_date")
+    return parser
+
+
+async def _run_crawl_command(args: argparse.Namespace) -> None:
+    domains = [d.strip() for d in args.domains.split(",") if d.strip()] if args.domains else None
+    count = await run_crawl_job(max_concurrent=args.concurrency, domains=domains)
+    # The prioritizer runs in the background; let it finish before the process exits
+    await asyncio.gather(*_background_tasks)
+    logger.info("Crawl command completed: upserted=%d", count)
+
+
+async def _run_prioritize_command(args: argparse.Namespace) -> None:
+    await run_prioritizer()
+
+
+async def _run_summarize_command(args: argparse.Namespace) -> None:
+    await run_summarizer(max_concurrent=args.concurrency, batch_mode=args.batch)
+
+
+async def _run_cleanup_command(args: argparse.Namespace) -> None:
+    await run_cleanup_job(days=args.days, by_publish_date=args.by_publish)
+
+
+_COMMANDS = {
+    "crawl": _run_crawl_command,
+    "prioritize": _run_prioritize_command,
+    "summarize": _run_summarize_command,
+    "cleanup": _run_cleanup_command,
+}
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from app.crawler.spider import close_client as close_http_client
+    from app.db.database import close_client
+    from app.db.redis_client import close_redis_client
+    from app.utils.content_extractor import close_client as close_extractor_client
+
+    try:
+        await _COMMANDS[args.command](args)
+    finally:
+        await asyncio.gather(
+            close_client(),
+            close_redis_client(),
+            close_http_client(),
+            close_extractor_client(),
+            return_exceptions=True,
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_main(_build_parser().parse_args()))
@@ -1,15 +1,12 @@
 """
-Startup script for Railway deployment.
-This script is run when the web service starts, and contains the logic to
-process the crawl and prioritization sequence.
+Startup script for Railway and Render deployments.
+Contains the internal crawl cron started by the app lifespan when
+RAILWAY or RENDER is set and STARTUP_TASK=cron.
 """
 import asyncio
-import os
 import logging
 from datetime import datetime
 from app.scheduler import run_crawl_job
-from fastapi import FastAPI
-from contextlib import asynccontextmanager
 
 logger = logging.getLogger(__name__)
 
@@ -30,17 +27,3 @@ async def run_crawl_cron():
         except Exception as e:
             logger.error(f"Error in scheduled crawl: {e}")
             await asyncio.sleep(600)
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    if os.getenv("RAILWAY") and os.getenv("STARTUP_TASK") == "cron":
-        logger.info("Starting internal crawl scheduler for Railway deployment")
-        asyncio.create_task(run_crawl_cron())
-    
-    yield  # This is where the application runs
-    
-    logger.info("Application shutting down")
-
-
-from app.main import app
-app.router.lifespan_context = lifespan
@@ -2,48 +2,121 @@ from __future__ import annotations
 
 import logging
 import asyncio
+import hashlib
 import os
-from typing import Optional
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
 import httpx
-from bs4 import BeautifulSoup
+import orjson
+from redis.asyncio import Redis
+from selectolax.lexbor import LexborNode
 
-from app.crawler.utils import fetch_html
+from app.crawler.utils import domain_from_url, fetch_tree
 
 logger = logging.getLogger(__name__)
 
+_client: Optional[httpx.AsyncClient] = None
 
-async def extract_article_content(url: str) -> Optional[str]:
+
+async def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared HTTP client for article pages and LLM APIs, creating it on first use.
+    Keeping connections alive skips a TCP/TLS handshake on every summary.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """
+    Close the shared HTTP client.
+    """
+    global _client
+    if _client is not None:
+        try:
+            await _client.aclose()
+        except Exception:
+            pass
+        _client = None
+
+_SELECTORS = (
+    "article",           # Standard article tag
+    ".article-body",     # Common class names
+    ".post-content",     # Common class names 
+    ".entry-content",    # Common class names
+    ".content",          # Common class names
+    "main",              # Main content area
+    ".main-content",     # Common class names
+    "p"                  # Paragraphs as fallback
+)
+
+
+_MAX_CACHED_DOMAINS = 256
+
+MAX_HTML_BYTES = int(os.environ.get("EXTRACT_MAX_HTML_BYTES", "512000"))  # Article HTML read per page
+
+# Domain -> index into _SELECTORS of the selector that last yielded content there,
+# kept in LRU order. A site's article container rarely changes, so it is tried first.
+_winning_selectors: "OrderedDict[str, int]" = OrderedDict()
+
+
+def _selector_order(domain: str) -> Sequence[int]:
+    winner = _winning_selectors.get(domain)
+    if winner is None:
+        return range(len(_SELECTORS))
+    _winning_selectors.move_to_end(domain)
+    return (winner, *(i for i in range(len(_SELECTORS)) if i != winner))
+
+
+def _remember_selector(domain: str, index: int) -> None:
+    if _winning_selectors.get(domain) == index:
+        return
+    _winning_selectors[domain] = index
+    _winning_selectors.move_to_end(domain)
+    if len(_winning_selectors) > _MAX_CACHED_DOMAINS:
+        _winning_selectors.popitem(last=False)
+
+
+def _join_paragraphs(paragraphs: List[LexborNode]) -> str:
+    content_text = " ".join([p.text().strip() for p in paragraphs[:10]])
+    return content_text[:2000]  # Limit content length
+
+
+async def extract_article_content(url: str, client: Optional[httpx.AsyncClient] = None) -> Optional[str]:
     """
     Extract article content from the given URL.
+    Uses the shared client unless one is passed in. The selector that matched last
+    time on the same domain is tried before the rest of the list. Only the first
+    MAX_HTML_BYTES of the page are read.
     """
     try:
-        soup = await fetch_html(httpx.AsyncClient(), url)
-        if not soup:
+        tree = await fetch_tree(client or await get_client(), url, max_bytes=MAX_HTML_BYTES)
+        if tree is None:
             return None
 
-        selectors = [
-            "article",           # Standard article tag
-            ".article-body",     # Common class names
-            ".post-content",     # Common class names 
-            ".entry-content",    # Common class names
-            ".content",          # Common class names
-            "main",              # Main content area
-            ".main-content",     # Common class names
-            "p"                  # Paragraphs as fallback
-        ]
-
-        for selector in selectors:
-            content = soup.select_one(selector)
-            if content:
-                paragraphs = content.find_all("p") if selector != "p" else content.find_all("p", recursive=False)
+        domain = domain_from_url(url)
+        for index in _selector_order(domain):
+            selector = _SELECTORS[index]
+            content = tree.css_first(selector)
+            if content is not None:
+                if selector != "p":
+                    paragraphs = content.css("p")
+                else:
+                    paragraphs = [child for child in content.iter() if child.tag == "p"]
                 if paragraphs:
-                    content_text = " ".join([p.get_text().strip() for p in paragraphs[:10]])
-                    return content_text[:2000]  # Limit content length
+                    _remember_selector(domain, index)
+                    return _join_paragraphs(paragraphs)
 
-        paragraphs = soup.find_all("p")
+        paragraphs = tree.css("p")
         if paragraphs:
-            content_text = " ".join([p.get_text().strip() for p in paragraphs[:10]])
-            return content_text[:2000]  # Limit content length
+            return _join_paragraphs(paragraphs)
 
         return None
 
@@ -52,20 +125,256 @@ async def extract_article_content(url: str) -> Optional[str]:
         return None
 
 
-async def summarize_with_llm(content: str, title: str) -> Optional[str]:
+_LLM_MODELS = {
+    "groq": "gemma2-9b-it",
+    "openai": "gpt-3.5-turbo",
+    "anthropic": "claude-3-haiku-20240307",
+}
+
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", "86400"))  # Seconds to keep cached summaries
+LLM_MAX_CONCURRENCY = max(1, int(os.environ.get("LLM_MAX_CONCURRENCY", "4")))  # LLM requests in flight at once
+
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+
+
+LLM_CONTENT_CHARS = int(os.environ.get("LLM_CONTENT_CHARS", "1200"))  # Article text sent per summary
+
+
+def _lede(content: str, limit: int = LLM_CONTENT_CHARS) -> str:
+    """
+    Trim article text to its opening, cutting at a word boundary. News leads with
+    the key facts, so the first paragraphs are all a 2-3 sentence summary needs.
+    """
+    if len(content) <= limit:
+        return content
+    cut = content.rfind(" ", 0, limit)
+    return content[:cut if cut > limit * 0.8 else limit]
+
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def _summary_cache_key(llm_service: str, title: str, content: str) -> str:
+    model = _LLM_MODELS.get(llm_service, "")
+    digest = hashlib.sha256(f"{llm_service}|{model}|{title}|{content}".encode()).hexdigest()
+    return f"llm:sum:{digest}"
+
+
+def _body_cache_key(llm_service: str, content: str) -> str:
+    """
+    Key on the article body alone, ignoring case, punctuation and spacing, so
+    syndicated copies of one wire story share a summary under different titles.
+    """
+    model = _LLM_MODELS.get(llm_service, "")
+    body = _NON_WORD_RE.sub(" ", content.casefold()).strip()
+    digest = hashlib.sha256(f"{llm_service}|{model}|{body}".encode()).hexdigest()
+    return f"llm:sum:body:{digest}"
+
+
+async def _cache_lookup(redis_client: Redis, keys: List[str]) -> List[Optional[str]]:
+    try:
+        return await redis_client.mget(keys)
+    except Exception as e:
+        logger.warning("LLM cache lookup failed: %s", e)
+        return [None] * len(keys)
+
+
+async def _cache_store(redis_client: Redis, entries: Dict[str, str]) -> None:
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key, summary in entries.items():
+                pipe.setex(key, LLM_CACHE_TTL, summary)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning("LLM cache store failed: %s", e)
+
+
+def _hash_cache_key(content_hash: str) -> str:
+    return f"llm:sum:hash:{content_hash}"
+
+
+async def cached_summaries_by_hash(redis_client: Redis, content_hashes: Dict[str, Optional[str]]) -> Dict[str, str]:
+    """
+    Look up summaries stored for the given {news_id: content_hash} pairs, so a
+    re-crawled article whose row was dropped skips extraction and the LLM entirely.
+    Returns {news_id: summary} for the hits.
+    """
+    ids = [news_id for news_id, content_hash in content_hashes.items() if content_hash]
+    if not ids:
+        return {}
+    cached = await _cache_lookup(redis_client, [_hash_cache_key(content_hashes[news_id]) for news_id in ids])
+    return {news_id: summary for news_id, summary in zip(ids, cached) if summary}
+
+
+async def cache_summaries_by_hash(redis_client: Redis, summaries: Dict[str, str]) -> None:
+    """
+    Store {content_hash: summary} pairs for cached_summaries_by_hash.
+    """
+    if summaries:
+        await _cache_store(redis_client, {
+            _hash_cache_key(content_hash): summary for content_hash, summary in summaries.items()
+        })
+
+
+async def summarize_with_llm(content: str, title: str, redis_client: Optional[Redis] = None) -> Optional[str]:
     """
     Call an LLM API to summarize the content.
     Configured for Groq with gemma2-9b-it model by default.
+    With a Redis client, summaries are cached by (service, model, title, content)
+    and by the normalized body, so retried or syndicated articles skip the API call.
     """
     llm_service = os.environ.get("LLM_SERVICE", "groq")
     api_key = os.environ.get("LLM_API_KEY")
-    rate_delay_s = float(os.environ.get("LLM_RATE_LIMIT_DELAY", "2.0"))
 
     if not api_key:
         logger.error("LLM_API_KEY environment variable not set")
         return None
 
+    if redis_client is None:
+        return await _request_summary(llm_service, api_key, content, title)
+
+    cache_keys = [_summary_cache_key(llm_service, title, content), _body_cache_key(llm_service, content)]
+    for cached in await _cache_lookup(redis_client, cache_keys):
+        if cached:
+            return cached
+
+    summary = await _request_summary(llm_service, api_key, content, title)
+    if summary:
+        await _cache_store(redis_client, dict.fromkeys(cache_keys, summary))
+    return summary
+
+
+async def summarize_batch_with_llm(
+    articles: List[Tuple[str, str, str]],
+    redis_client: Optional[Redis] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Summarize several (id, title, content) articles with a single LLM request.
+    The model is asked for a JSON array of {id, summary}; ids it leaves out map to None.
+    Cached summaries are served first, and only the misses go into the request.
+    """
+    llm_service = os.environ.get("LLM_SERVICE", "groq")
+    api_key = os.environ.get("LLM_API_KEY")
+
+    summaries: Dict[str, Optional[str]] = {news_id: None for news_id, _, _ in articles}
+    if not api_key:
+        logger.error("LLM_API_KEY environment variable not set")
+        return summaries
+
+    keys: Dict[str, List[str]] = {
+        news_id: [_summary_cache_key(llm_service, title, content), _body_cache_key(llm_service, content)]
+        for news_id, title, content in articles
+    }
+    pending = articles
+    if redis_client is not None:
+        flat = [key for news_id, _, _ in articles for key in keys[news_id]]
+        cached = await _cache_lookup(redis_client, flat)
+        pending = []
+        for i, article in enumerate(articles):
+            hit = cached[2 * i] or cached[2 * i + 1]
+            if hit:
+                summaries[article[0]] = hit
+            else:
+                pending.append(article)
+
+    if not pending:
+        return summaries
+
+    if len(pending) == 1:
+        news_id, title, content = pending[0]
+        results = {news_id: await _request_summary(llm_service, api_key, content, title)}
+    else:
+        results = await _request_batch_summary(llm_service, api_key, pending)
+
+    summaries.update(results)
+    if redis_client is not None:
+        entries = {key: summary for news_id, summary in results.items() if summary for key in keys[news_id]}
+        if entries:
+            await _cache_store(redis_client, entries)
+    return summaries
+
+
+async def _request_summary(llm_service: str, api_key: str, content: str, title: str) -> Optional[str]:
+    """
+    Send one summarization request to the configured LLM service.
+    """
+    if llm_service == "groq":
+        instruction = "Ringkas artikel berikut dalam 2-3 kalimat dengan bahasa Indonesia yang baku.\n"
+    else:
+        instruction = "Ringkas artikel berikut dalam 2-3 kalimat.\n"
+    prompt = (
+        instruction
+        + f"Judul: {title}\n"
+        f"Isi: {_lede(content)}"
+    )
+    return await _request_completion(llm_service, api_key, prompt, max_tokens=200)
+
+
+def _parse_batch_summaries(text: str, count: int) -> Dict[int, str]:
+    """
+    Read the {id, summary} JSON array from a batch reply, tolerating text around it.
+    """
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end <= start:
+        return {}
     try:
+        entries = orjson.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+
+    parsed: Dict[int, str] = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        summary = entry.get("summary")
+        try:
+            index = int(entry.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if 1 <= index <= count and isinstance(summary, str) and summary.strip():
+            parsed[index] = summary.strip()
+    return parsed
+
+
+async def _request_batch_summary(
+    llm_service: str,
+    api_key: str,
+    articles: List[Tuple[str, str, str]],
+) -> Dict[str, Optional[str]]:
+    """
+    Summarize several articles in one request. Articles are numbered 1..N in the
+    prompt so the reply stays short and maps back without echoing row ids.
+    """
+    prompt = (
+        "Ringkas setiap artikel berikut dalam 2-3 kalimat dengan bahasa Indonesia yang baku.\n"
+        'Balas hanya dengan JSON array [{"id": <nomor artikel>, "summary": "<ringkasan>"}].\n'
+    )
+    for i, (_, title, content) in enumerate(articles, start=1):
+        prompt += f"\nArtikel {i}\nJudul: {title}\nIsi: {_lede(content)}\n"
+
+    text = await _request_completion(llm_service, api_key, prompt, max_tokens=200 * len(articles))
+    parsed = _parse_batch_summaries(text or "", len(articles))
+    if text and len(parsed) < len(articles):
+        logger.warning("Batch summary covered %d of %d articles", len(parsed), len(articles))
+    return {news_id: parsed.get(i) for i, (news_id, _, _) in enumerate(articles, start=1)}
+
+
+async def _request_completion(llm_service: str, api_key: str, prompt: str, max_tokens: int) -> Optional[str]:
+    """
+    Send a prompt to the configured LLM service and return the reply text.
+    At most LLM_MAX_CONCURRENCY requests are in flight across the process,
+    whatever the RPM limiter would allow.
+    """
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    async with _llm_semaphore:
+        return await _post_completion(llm_service, api_key, prompt, max_tokens)
+
+
+async def _post_completion(llm_service: str, api_key: str, prompt: str, max_tokens: int) -> Optional[str]:
+    try:
+        client = await get_client()
 
         if llm_service == "groq":
             headers = {
@@ -73,29 +382,22 @@ async def summarize_with_llm(content: str, title: str) -> Optional[str]:
                 "Content-Type": "application/json",
             }
 
-            prompt = (
-                "Ringkas artikel berikut dalam 2-3 kalimat dengan bahasa Indonesia yang baku.\n"
-                f"Judul: {title}\n"
-                f"Isi: {content}"
-            )
-
             payload = {
-                "model": "gemma2-9b-it",
+                "model": _LLM_MODELS["groq"],
                 "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 200,
+                "max_tokens": max_tokens,
                 "temperature": 0.5,
                 "top_p": 0.9,
             }
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    "https://api.groq.com/openai/v1/chat/completions",
-                    headers=headers,
-                    json=payload,
-                )
+            response = await client.post(
+                "https://api.groq.com/openai/v1/chat/completions",
+                headers=headers,
+                content=orjson.dumps(payload),
+            )
 
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 try:
                     return data["choices"][0]["message"]["content"].strip()
                 except Exception:
@@ -110,25 +412,19 @@ async def summarize_with_llm(content: str, title: str) -> Optional[str]:
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json",
             }
-            prompt = (
-                "Ringkas artikel berikut dalam 2-3 kalimat.\n"
-                f"Judul: {title}\n"
-                f"Isi: {content}"
-            )
             payload = {
-                "model": "gpt-3.5-turbo",
+                "model": _LLM_MODELS["openai"],
                 "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 200,
+                "max_tokens": max_tokens,
                 "temperature": 0.5,
             }
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers=headers,
-                    json=payload,
-                )
+            response = await client.post(
+                "https://api.openai.com/v1/chat/completions",
+                headers=headers,
+                content=orjson.dumps(payload),
+            )
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 try:
                     return data["choices"][0]["message"]["content"].strip()
                 except Exception:
@@ -144,26 +440,19 @@ async def summarize_with_llm(content: str, title: str) -> Optional[str]:
                 "Content-Type": "application/json",
                 "anthropic-version": "2023-06-01",
             }
-            prompt = (
-                "Human: Ringkas artikel berikut dalam 2-3 kalimat.\n"
-                f"Judul: {title}\n"
-                f"Isi: {content}\n\n"
-                "Assistant:"
-            )
             payload = {
-                "model": "claude-3-haiku-20240307",
-                "prompt": prompt,
-                "max_tokens_to_sample": 200,
+                "model": _LLM_MODELS["anthropic"],
+                "prompt": f"Human: {prompt}\n\nAssistant:",
+                "max_tokens_to_sample": max_tokens,
                 "temperature": 0.5,
             }
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    "https://api.anthropic.com/v1/complete",
-                    headers=headers,
-                    json=payload,
-                )
+            response = await client.post(
+                "https://api.anthropic.com/v1/complete",
+                headers=headers,
+                content=orjson.dumps(payload),
+            )
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 try:
                     return data["completion"].strip()
                 except Exception:
@@ -179,4 +468,4 @@ async def summarize_with_llm(content: str, title: str) -> Optional[str]:
 
     except Exception as e:
         logger.error(f"Error calling LLM API: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -2,39 +2,133 @@ from __future__ import annotations
 
 import logging
 import asyncio
-from typing import Optional, Tuple
-import json
+import os
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
 
 from app.db.database import get_supabase_client
-from app.db.redis_client import get_redis_client, NEWS_SUMMARIZATION_QUEUE, FAILED_SUMMARIZATION_QUEUE
-from app.utils.content_extractor import extract_article_content, summarize_with_llm
+from app.db.redis_client import bump_news_version, get_redis_client, NEWS_SUMMARIZATION_QUEUE, FAILED_SUMMARIZATION_QUEUE
+from app.utils.content_extractor import (
+    cache_summaries_by_hash,
+    cached_summaries_by_hash,
+    extract_article_content,
+    summarize_batch_with_llm,
+    summarize_with_llm,
+)
 
 logger = logging.getLogger(__name__)
 
-RATE_LIMIT_DELAY = float(__import__('os').environ.get('LLM_RATE_LIMIT_DELAY', 2.0))  # seconds between requests
+RATE_LIMIT_DELAY = float(os.environ.get('LLM_RATE_LIMIT_DELAY', 2.0))  # seconds between requests
 
-MAX_RETRY_ATTEMPTS = int(__import__('os').environ.get('MAX_RETRY_ATTEMPTS', 3))
-FAILED_QUEUE_TTL = int(__import__('os').environ.get('FAILED_QUEUE_TTL', 3600))  # TTL in seconds for failed items
+MAX_RETRY_ATTEMPTS = int(os.environ.get('MAX_RETRY_ATTEMPTS', 3))
+FAILED_QUEUE_TTL = int(os.environ.get('FAILED_QUEUE_TTL', 3600))  # TTL in seconds for failed items
+RETRY_BASE_DELAY = float(os.environ.get('RETRY_BASE_DELAY', 60))  # seconds before the first retry
+RETRY_MAX_DELAY = min(float(os.environ.get('RETRY_MAX_DELAY', 1800)), FAILED_QUEUE_TTL / 2)  # stay inside the TTL
+RETRY_JITTER = 5.0  # seconds of random spread so failed batches don't retry in lockstep
+MIN_DESCRIPTION_CHARS = int(os.environ.get('MIN_DESCRIPTION_CHARS', 200))  # Feed text long enough to skip extraction
+FAILED_ATTEMPTS_KEY = f"{FAILED_SUMMARIZATION_QUEUE}:attempts"  # news_id -> {"score", "attempts"}
+IDLE_BLOCK_TIMEOUT = 4  # seconds to block on an empty queue; below the Redis socket timeout
+LLM_BURST = int(os.environ.get('LLM_BURST', 1))  # LLM requests allowed back to back
+LLM_BATCH_SIZE = max(1, int(os.environ.get('LLM_BATCH_SIZE', 5)))  # Articles per LLM request
+MIN_CONTENT_CHARS = int(os.environ.get('MIN_CONTENT_CHARS', 200))  # Shorter extractions are not worth an LLM call
+
+# Paywall, consent and bot-check pages the extractor can return instead of an article
+_BLOCKED_CONTENT_RE = re.compile(
+    r"subscribe to (?:continue|read)|please enable javascript|enable javascript and cookies"
+    r"|are you a robot|verify you are human|berlangganan untuk (?:melanjutkan|membaca)"
+    r"|aktifkan javascript",
+    re.IGNORECASE,
+)
+
+
+def _unusable_content(content: str) -> Optional[str]:
+    """
+    Return why extracted content should not be sent to the LLM, or None if it looks like an article.
+    """
+    text = content.strip()
+    if len(text) < MIN_CONTENT_CHARS:
+        return f"only {len(text)} characters"
+    visible = [c for c in text if not c.isspace()]
+    if sum(c.isalpha() for c in visible) < 0.1 * len(visible):
+        return "mostly non-alphabetic"
+    if _BLOCKED_CONTENT_RE.search(text):
+        return "paywall or bot-check text"
+    return None
+
+# Atomically move failed items that are due (failed-queue score = retry time <= ARGV[2])
+# back to the main queue at their priority score - 5 while under MAX_RETRY_ATTEMPTS,
+# dropping the rest. A requeued item keeps its attempt record, so the worker that
+# pops it knows which attempt it is on. Returns {requeued, dropped}.
+_RETRY_SWEEP_LUA = """
+local failed, main, attempts_key = KEYS[1], KEYS[2], KEYS[3]
+local max_attempts, now = tonumber(ARGV[1]), tonumber(ARGV[2])
+local items = redis.call('ZRANGEBYSCORE', failed, '-inf', now)
+local requeued, dropped = 0, 0
+for _, id in ipairs(items) do
+    local data = redis.call('HGET', attempts_key, id)
+    local attempts, score = 0, 0
+    if data then
+        local ok, info = pcall(cjson.decode, data)
+        if ok and type(info) == 'table' then
+            attempts = tonumber(info['attempts']) or 1
+            score = tonumber(info['score']) or 0
+        else
+            attempts = 1
+        end
+    end
+    if not data or attempts < max_attempts then
+        redis.call('ZADD', main, score - 5, id)
+        requeued = requeued + 1
+    else
+        redis.call('HDEL', attempts_key, id)
+        dropped = dropped + 1
+    end
+    redis.call('ZREM', failed, id)
+end
+return {requeued, dropped}
+"""
+
+# Pop up to ARGV[1] highest-priority items together with their attempt records.
+# Returns a flat {id, score, attempts_json_or_nil, ...} list.
+_POP_TASKS_LUA = """
+local popped = redis.call('ZPOPMAX', KEYS[1], tonumber(ARGV[1]))
+local out = {}
+for i = 1, #popped, 2 do
+    out[#out + 1] = popped[i]
+    out[#out + 1] = popped[i + 1]
+    out[#out + 1] = redis.call('HGET', KEYS[2], popped[i]) or false
+end
+return out
+"""
 
 class AsyncLLMRateLimiter:
     """
     Global rate limiter to ensure Groq RPM compliance across concurrent tasks.
-    Enforces a minimum interval between LLM requests (e.g., 2.0s => ~30 RPM).
+    Token bucket refilled at one token per min_interval (e.g., 2.0s => ~30 RPM),
+    holding up to `burst` tokens. Callers reserve a token up front, letting the
+    balance go negative, and sleep exactly as long as their reservation is short;
+    no lock is needed since the event loop runs acquire() to its first await.
     """
-    def __init__(self, min_interval: float = 2.0):
-        self._min_interval = float(min_interval)
-        self._lock = asyncio.Lock()
-        self._last_ts = 0.0
+    def __init__(self, min_interval: float = 2.0, burst: int = 1):
+        self._rate = 1.0 / float(min_interval) if min_interval > 0 else float("inf")
+        self._capacity = float(max(1, burst))
+        self._tokens = self._capacity
+        self._last_refill: Optional[float] = None
 
     async def acquire(self):
-        async with self._lock:
-            loop = asyncio.get_running_loop()
-            now = loop.time()
-            delta = now - self._last_ts
-            if delta < self._min_interval:
-                await asyncio.sleep(self._min_interval - delta)
-            self._last_ts = loop.time()
+        if self._rate == float("inf"):
+            return
+        now = asyncio.get_running_loop().time()
+        if self._last_refill is not None:
+            self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+        self._tokens -= 1.0
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self._rate)
 
 class SummarizerWorker:
     def __init__(self, max_concurrent: int = 1):
@@ -43,21 +137,33 @@ class SummarizerWorker:
         self.redis_client = None
         # Create per-run rate limiter (avoid cross-loop asyncio.Lock reuse)
         self.rate_limiter: Optional[AsyncLLMRateLimiter] = None
+        self._retry_sweep = None
+        self._pop_tasks = None
+        # Set when rows change, so cached /api/news pages are invalidated once per batch
+        self._news_changed = False
 
     async def initialize(self):
         """Initialize database and Redis connections."""
         self.supabase = await get_supabase_client()
         self.redis_client = await get_redis_client()
         # Initialize limiter within the current event loop
-        self.rate_limiter = AsyncLLMRateLimiter(min_interval=RATE_LIMIT_DELAY)
+        self.rate_limiter = AsyncLLMRateLimiter(min_interval=RATE_LIMIT_DELAY, burst=LLM_BURST)
+        # Script handles hash their source once and are reused for every call
+        self._retry_sweep = self.redis_client.register_script(_RETRY_SWEEP_LUA)
+        self._pop_tasks = self.redis_client.register_script(_POP_TASKS_LUA)
 
-    async def get_next_task(self) -> Optional[Tuple[str, int]]:
+    async def get_next_task(self, block: float = 0) -> Optional[Tuple[str, int]]:
         """
         Get the highest priority task from the queue.
+        With block > 0, waits server-side up to that many seconds for an item (BZPOPMAX).
         Returns (news_id, score) or None if queue is empty.
         """
         try:
-            result = await self.redis_client.zpopmax(NEWS_SUMMARIZATION_QUEUE, count=1)
+            if block > 0:
+                popped = await self.redis_client.bzpopmax(NEWS_SUMMARIZATION_QUEUE, timeout=block)
+                result = [tuple(popped[1:])] if popped else None
+            else:
+                result = await self.redis_client.zpopmax(NEWS_SUMMARIZATION_QUEUE, count=1)
             if not result:
                 return None
 
@@ -78,140 +184,356 @@ class SummarizerWorker:
 
             return None
         except Exception as e:
-            logger.error(f"Error getting next task from queue: {e}")
+            logger.error("Error getting next task from queue: %s", e)
             return None
 
+    async def pop_tasks(self, count: int) -> List[Tuple[str, int, Optional[str]]]:
+        """
+        Pop up to `count` highest-priority tasks and their attempt records in one
+        round trip. Returns (news_id, score, attempts_json or None) tuples.
+        """
+        flat = await self._pop_tasks(
+            keys=[NEWS_SUMMARIZATION_QUEUE, FAILED_ATTEMPTS_KEY],
+            args=[count],
+        )
+        return [
+            (flat[i], int(float(flat[i + 1])), flat[i + 2])
+            for i in range(0, len(flat), 3)
+        ]
+
+    @staticmethod
+    def _next_attempt(attempts_data: Optional[str]) -> int:
+        if not attempts_data:
+            return 1
+        return orjson.loads(attempts_data).get("attempts", 1) + 1
+
     async def update_news_summary(self, news_id: str, summary: str) -> bool:
         """
         Update the summary field of a news item in the database.
         """
         try:
-            response = self.supabase.table("news").update({"summary": summary}).eq("id", news_id).execute()
-            logger.info(f"Updated summary for news item {news_id}")
+            response = await self.supabase.table("news").update({"summary": summary}).eq("id", news_id).execute()
+            self._news_changed = True
+            logger.info("Updated summary for news item %s", news_id)
             return True
         except Exception as e:
-            logger.error(f"Error updating summary for news item {news_id}: {e}")
+            logger.error("Error updating summary for news item %s: %s", news_id, e)
             return False
 
+    async def update_news_summaries(self, summaries: Dict[str, str]) -> bool:
+        """
+        Write several summaries with one update_news_summaries RPC call, falling back to
+        per-row updates when the function is not installed.
+        """
+        items = [{"id": news_id, "summary": summary} for news_id, summary in summaries.items()]
+        try:
+            await self.supabase.rpc("update_news_summaries", {"items": items}).execute()
+            self._news_changed = True
+            logger.info("Updated summaries for %s news items", len(items))
+            return True
+        except Exception as e:
+            logger.warning("Batch summary update failed, updating rows one at a time: %s", e)
+        results = await asyncio.gather(*(
+            self.update_news_summary(news_id, summary) for news_id, summary in summaries.items()
+        ))
+        return all(results)
+
     async def delete_news_item(self, news_id: str) -> bool:
         """
         Delete a news item from the database by ID.
         Removes incomplete/failed records to keep the DB clean.
         """
         try:
-            self.supabase.table("news").delete().eq("id", news_id).execute()
-            logger.info(f"Deleted news item {news_id} from database")
+            await self.supabase.table("news").delete().eq("id", news_id).execute()
+            self._news_changed = True
+            logger.info("Deleted news item %s from database", news_id)
             return True
         except Exception as e:
-            logger.error(f"Error deleting news item {news_id}: {e}")
+            logger.error("Error deleting news item %s: %s", news_id, e)
             return False
 
+    async def _invalidate_news_cache(self) -> None:
+        """
+        Bump the /api/news cache version if summaries were written or rows deleted.
+        """
+        if not self._news_changed:
+            return
+        self._news_changed = False
+        try:
+            await bump_news_version()
+        except Exception as e:
+            logger.warning("Failed to invalidate cached news lists: %s", e)
+
     async def add_to_failed_queue(self, news_id: str, score: int, attempt: int = 1):
         """
         Add a news item to the failed queue for retry later.
         """
+        await self.add_many_to_failed_queue([(news_id, score, attempt)])
+
+    async def add_many_to_failed_queue(self, items: List[Tuple[str, int, int]]):
+        """
+        Add (news_id, score, attempt) items to the failed queue with one HSET and one
+        ZADD in a single pipeline.
+        The failed-queue score is the time the item becomes due: RETRY_BASE_DELAY
+        doubled per attempt, capped at RETRY_MAX_DELAY, plus up to RETRY_JITTER seconds.
+        """
+        if not items:
+            return
         try:
-            attempt_data = json.dumps({"score": score, "attempts": attempt})
-            await self.redis_client.hset(f"{FAILED_SUMMARIZATION_QUEUE}:attempts", news_id, attempt_data)
-            await self.redis_client.zadd(FAILED_SUMMARIZATION_QUEUE, {news_id: score})
-            await self.redis_client.expire(FAILED_SUMMARIZATION_QUEUE, FAILED_QUEUE_TTL)
-            await self.redis_client.expire(f"{FAILED_SUMMARIZATION_QUEUE}:attempts", FAILED_QUEUE_TTL)
-            logger.info(f"Added news item {news_id} to failed queue (attempt #{attempt})")
+            now = time.time()
+            records = {
+                news_id: orjson.dumps({"score": score, "attempts": attempt})
+                for news_id, score, attempt in items
+            }
+            due = {
+                news_id: now + min(RETRY_BASE_DELAY * 2 ** (attempt - 1), RETRY_MAX_DELAY) + random.uniform(0, RETRY_JITTER)
+                for news_id, _, attempt in items
+            }
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.hset(FAILED_ATTEMPTS_KEY, mapping=records)
+                pipe.zadd(FAILED_SUMMARIZATION_QUEUE, due)
+                pipe.expire(FAILED_SUMMARIZATION_QUEUE, FAILED_QUEUE_TTL)
+                pipe.expire(FAILED_ATTEMPTS_KEY, FAILED_QUEUE_TTL)
+                await pipe.execute()
+            for news_id, _, attempt in items:
+                logger.info("Added news item %s to failed queue (attempt #%s)", news_id, attempt)
         except Exception as e:
-            logger.error(f"Error adding news item {news_id} to failed queue: {e}")
+            logger.error("Error adding %s news items to failed queue: %s", len(items), e)
 
-    async def process_news_item(self, news_id: str, attempt: int = 1) -> bool:
+    async def _retry_or_delete(self, failed: List[Tuple[str, int, int]]) -> None:
         """
-        Process a single news item: extract content, summarize, and update database.
-        Returns True if successful, False otherwise.
+        After failed LLM calls, keep the (news_id, score, attempt) rows and schedule
+        another attempt through the failed queue; rows that reached MAX_RETRY_ATTEMPTS
+        are deleted instead.
+        """
+        retry = [item for item in failed if item[2] < MAX_RETRY_ATTEMPTS]
+        exhausted = [news_id for news_id, _, attempt in failed if attempt >= MAX_RETRY_ATTEMPTS]
+        for news_id in exhausted:
+            logger.warning("News item %s failed %s attempts; deleting row", news_id, MAX_RETRY_ATTEMPTS)
+        await asyncio.gather(
+            self.add_many_to_failed_queue(retry),
+            *(self.delete_news_item(news_id) for news_id in exhausted),
+        )
+
+    async def fetch_news_rows(self, news_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch url, title, feed description and content hash for many news items in one query, keyed by id.
+        """
+        response = await (
+            self.supabase.table("news")
+            .select("id, url, title, description, content_hash")
+            .in_("id", news_ids)
+            .execute()
+        )
+        return {str(row["id"]): row for row in response.data or []}
+
+    async def _load_article(
+        self,
+        news_id: str,
+        attempt: int = 1,
+        rows: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> Tuple[Optional[Tuple[str, str]], bool]:
+        """
+        Fetch the item's title and extract its article content, or use the feed
+        description when it is long enough to summarize. Pass rows from
+        fetch_news_rows to skip the per-item select.
+        Returns ((title, content), True) when the item is ready to summarize; otherwise
+        (None, result), with missing-content rows already deleted.
         """
         try:
-            response = self.supabase.table("news").select("url, title").eq("id", news_id).execute()
-            items = response.data
+            if rows is None:
+                rows = await self.fetch_news_rows([news_id])
             
-            if not items:
-                logger.error(f"News item {news_id} not found in database")
-                return False
+            item = rows.get(news_id)
+            if not item:
+                logger.error("News item %s not found in database", news_id)
+                return None, False
             
-            item = items[0]
             url = item.get('url')
             title = item.get('title', '')
             
             if not url:
-                logger.error(f"News item {news_id} has no URL")
-                return False
+                logger.error("News item %s has no URL", news_id)
+                return None, False
+            
+            description = item.get('description') or ''
+            if len(description) >= MIN_DESCRIPTION_CHARS:
+                logger.info("Using feed description for news item %s (attempt #%s)", news_id, attempt)
+                return (title, description), True
             
-            logger.info(f"Extracting content from {url} (attempt #{attempt})")
+            logger.info("Extracting content from %s (attempt #%s)", url, attempt)
             content = await extract_article_content(url)
             
             if not content:
-                logger.warning(f"No content extracted from {url}")
+                logger.warning("No content extracted from %s", url)
                 await self.delete_news_item(news_id)
-                return True
+                return None, True
             
-            logger.info(f"Summarizing content for news item {news_id} (attempt #{attempt})")
-            # Acquire per-run limiter tied to the current event loop
-            if not self.rate_limiter:
-                self.rate_limiter = AsyncLLMRateLimiter(min_interval=RATE_LIMIT_DELAY)
-            await self.rate_limiter.acquire()
-            summary = await summarize_with_llm(content, title)
+            reason = _unusable_content(content)
+            if reason:
+                logger.warning("Skipping LLM for news item %s: extracted content is %s; deleting row", news_id, reason)
+                await self.delete_news_item(news_id)
+                return None, True
             
-            # If summarization failed or produced placeholder, delete the row immediately
-            placeholder = "No content available for summarization"
-            if not summary or (isinstance(summary, str) and summary.strip().lower() == placeholder.lower()):
-                if not summary:
-                    logger.error(f"Failed to generate summary for news item {news_id} (attempt #{attempt})")
-                else:
-                    logger.warning(f"Summary is placeholder for news item {news_id}; deleting row")
+            return (title, content), True
+            
+        except Exception as e:
+            logger.error("Error processing news item %s (attempt #%s): %s", news_id, attempt, e)
+            try:
                 await self.delete_news_item(news_id)
+            except Exception:
+                pass
+            return None, True
+
+    def _unusable_summary(self, news_id: str, summary: Optional[str], attempt: int = 1) -> bool:
+        """
+        Return True (and log why) when a summary is missing or just the placeholder.
+        """
+        placeholder = "No content available for summarization"
+        if not summary:
+            logger.error("Failed to generate summary for news item %s (attempt #%s)", news_id, attempt)
+            return True
+        if isinstance(summary, str) and summary.strip().lower() == placeholder.lower():
+            logger.warning("Summary is placeholder for news item %s; deleting row", news_id)
+            return True
+        return False
+
+    async def _store_summary(self, news_id: str, summary: Optional[str], attempt: int = 1, score: int = 0) -> bool:
+        """
+        Save a generated summary. A placeholder summary deletes the row; a failed
+        summarization is retried later with backoff.
+        """
+        try:
+            if self._unusable_summary(news_id, summary, attempt):
+                if summary:
+                    await self.delete_news_item(news_id)
+                else:
+                    await self._retry_or_delete([(news_id, score, attempt)])
                 return True
             
             success = await self.update_news_summary(news_id, summary)
             if success:
-                logger.info(f"Successfully processed news item {news_id} (attempt #{attempt})")
+                logger.info("Successfully processed news item %s (attempt #%s)", news_id, attempt)
             else:
-                logger.error(f"Failed to update summary in database for news item {news_id} (attempt #{attempt})")
+                logger.error("Failed to update summary in database for news item %s (attempt #%s)", news_id, attempt)
             
             return success
             
         except Exception as e:
-            logger.error(f"Error processing news item {news_id} (attempt #{attempt}): {e}")
+            logger.error("Error processing news item %s (attempt #%s): %s", news_id, attempt, e)
             try:
                 await self.delete_news_item(news_id)
             except Exception:
                 pass
             return True
 
-    async def retry_failed_items(self):
+    async def _summarize(self, title: str, content: str) -> Optional[str]:
+        # Acquire per-run limiter tied to the current event loop
+        if not self.rate_limiter:
+            self.rate_limiter = AsyncLLMRateLimiter(min_interval=RATE_LIMIT_DELAY, burst=LLM_BURST)
+        await self.rate_limiter.acquire()
+        return await summarize_with_llm(content, title, redis_client=self.redis_client)
+
+    async def process_news_item(self, news_id: str, attempt: int = 1, score: int = 0) -> bool:
         """
-        Move items from the failed queue back to the main queue if they haven't exceeded max attempts.
+        Process a single news item: extract content, summarize, and update database.
+        Returns True if successful, False otherwise.
         """
+        article, result = await self._load_article(news_id, attempt=attempt)
+        if article is None:
+            return result
+        
+        title, content = article
+        logger.info("Summarizing content for news item %s (attempt #%s)", news_id, attempt)
         try:
-            failed_items = await self.redis_client.zrange(FAILED_SUMMARIZATION_QUEUE, 0, -1, withscores=True)
+            summary = await self._summarize(title, content)
+        except Exception as e:
+            logger.error("Error summarizing news item %s (attempt #%s): %s", news_id, attempt, e)
+            summary = None
+        return await self._store_summary(news_id, summary, attempt=attempt, score=score)
+
+    async def summarize_articles(
+        self,
+        articles: List[Tuple[str, int, str, str]],
+        content_hashes: Optional[Dict[str, Optional[str]]] = None,
+        scores: Optional[Dict[str, int]] = None,
+    ) -> List[bool]:
+        """
+        Summarize loaded (news_id, attempt, title, content) articles, LLM_BATCH_SIZE per request,
+        and store the results. Articles a batch reply leaves out are retried one at a time.
+        Stored summaries are also cached under the {news_id: content_hash} given, and
+        articles still without a summary go to the failed queue at their score in scores.
+        """
+        results: List[bool] = []
+        for start in range(0, len(articles), LLM_BATCH_SIZE):
+            chunk = articles[start:start + LLM_BATCH_SIZE]
+            logger.info("Summarizing %s news items in one LLM request", len(chunk))
+            if not self.rate_limiter:
+                self.rate_limiter = AsyncLLMRateLimiter(min_interval=RATE_LIMIT_DELAY, burst=LLM_BURST)
+            await self.rate_limiter.acquire()
+            try:
+                summaries = await summarize_batch_with_llm(
+                    [(news_id, title, content) for news_id, _, title, content in chunk],
+                    redis_client=self.redis_client,
+                )
+            except Exception as e:
+                logger.error("Error summarizing batch of %s news items: %s", len(chunk), e)
+                summaries = {}
             
-            for news_id, score in failed_items:
-                attempts_data = await self.redis_client.hget(f"{FAILED_SUMMARIZATION_QUEUE}:attempts", news_id)
-                if attempts_data:
-                    attempts_info = json.loads(attempts_data)
-                    attempts = attempts_info.get("attempts", 1)
-                    
-                    if attempts < MAX_RETRY_ATTEMPTS:
-                        new_score = score - 5  # Reduce score for retry
-                        await self.redis_client.zadd(NEWS_SUMMARIZATION_QUEUE, {news_id: new_score})
-                        await self.redis_client.zrem(FAILED_SUMMARIZATION_QUEUE, news_id)
-                        await self.redis_client.hdel(f"{FAILED_SUMMARIZATION_QUEUE}:attempts", news_id)
-                        logger.info(f"Moved news item {news_id} back to main queue for retry #{attempts + 1}")
-                    else:
-                        logger.info(f"Max retry attempts reached for news item {news_id}. Removing from failed queue.")
-                        await self.redis_client.zrem(FAILED_SUMMARIZATION_QUEUE, news_id)
-                        await self.redis_client.hdel(f"{FAILED_SUMMARIZATION_QUEUE}:attempts", news_id)
+            if len(chunk) > 1:
+                for news_id, attempt, title, content in chunk:
+                    if not summaries.get(news_id):
+                        try:
+                            summaries[news_id] = await self._summarize(title, content)
+                        except Exception as e:
+                            logger.error("Error summarizing news item %s (attempt #%s): %s", news_id, attempt, e)
+                            summaries[news_id] = None
+            
+            # Placeholder summaries are deleted and failed ones retried later; the rest go out in one write
+            pending: Dict[str, str] = {}
+            discarded: List[str] = []
+            failed: List[Tuple[str, int, int]] = []
+            for news_id, attempt, _, _ in chunk:
+                summary = summaries.get(news_id)
+                if not self._unusable_summary(news_id, summary, attempt):
+                    pending[news_id] = summary
+                elif summary:
+                    discarded.append(news_id)
                 else:
-                    await self.redis_client.zadd(NEWS_SUMMARIZATION_QUEUE, {news_id: score - 5})
-                    await self.redis_client.zrem(FAILED_SUMMARIZATION_QUEUE, news_id)
-                    logger.info(f"Re-queued unknown news item {news_id} to main queue")
+                    failed.append((news_id, (scores or {}).get(news_id, 0), attempt))
+            
+            if discarded or failed:
+                await asyncio.gather(
+                    self._retry_or_delete(failed),
+                    *(self.delete_news_item(news_id) for news_id in discarded),
+                )
+            stored = await self.update_news_summaries(pending) if pending else True
+            if pending and not stored:
+                logger.error("Failed to update summaries in database for %s news items", len(pending))
+            elif pending and content_hashes:
+                await cache_summaries_by_hash(self.redis_client, {
+                    content_hashes[news_id]: summary
+                    for news_id, summary in pending.items()
+                    if content_hashes.get(news_id)
+                })
+            results.extend(stored if news_id in pending else True for news_id, _, _, _ in chunk)
+        return results
+
+    async def retry_failed_items(self):
+        """
+        Move due items from the failed queue back to the main queue if they haven't exceeded max attempts.
+        Runs as one Lua script, so the sweep is atomic and a single round trip.
+        """
+        try:
+            requeued, dropped = await self._retry_sweep(
+                keys=[FAILED_SUMMARIZATION_QUEUE, NEWS_SUMMARIZATION_QUEUE, FAILED_ATTEMPTS_KEY],
+                args=[MAX_RETRY_ATTEMPTS, time.time()],
+            )
+            if requeued or dropped:
+                logger.info("Moved %s failed items back to main queue; dropped %s at max retry attempts", requeued, dropped)
                     
         except Exception as e:
-            logger.error(f"Error processing failed queue for retries: {e}")
+            logger.error("Error processing failed queue for retries: %s", e)
 
     async def run(self):
         """
@@ -231,68 +553,100 @@ class SummarizerWorker:
                     await self.retry_failed_items()
                     retry_check_counter = 0
                 
-                task = await self.get_next_task()
-                
-                if not task:
-                    logger.debug("No tasks in queue, waiting...")
-                    await asyncio.sleep(5)
-                    continue
-                
-                news_id, score = task
-                attempts_data = await self.redis_client.hget(f"{FAILED_SUMMARIZATION_QUEUE}:attempts", news_id)
-                attempt = 1
+                # Busy queue: pop and read the attempt record in one script call;
+                # only an empty queue falls back to blocking in BZPOPMAX
+                popped = await self.pop_tasks(1)
+                if popped:
+                    news_id, score, attempts_data = popped[0]
+                else:
+                    task = await self.get_next_task(block=IDLE_BLOCK_TIMEOUT)
+                    if not task:
+                        logger.debug("No tasks in queue, waiting...")
+                        continue
+                    news_id, score = task
+                    attempts_data = await self.redis_client.hget(FAILED_ATTEMPTS_KEY, news_id)
+                attempt = self._next_attempt(attempts_data)  # Next attempt number
+                # Cleared before processing, so a failure can record the new attempt
                 if attempts_data:
-                    attempts_info = json.loads(attempts_data)
-                    attempt = attempts_info.get("attempts", 1) + 1  # Next attempt number
+                    await self.redis_client.hdel(FAILED_ATTEMPTS_KEY, news_id)
                 
-                logger.info(f"Processing news item {news_id} with priority score {score} (attempt #{attempt})")
+                logger.info("Processing news item %s with priority score %s (attempt #%s)", news_id, score, attempt)
                 
-                success = await self.process_news_item(news_id, attempt=attempt)
+                success = await self.process_news_item(news_id, attempt=attempt, score=score)
                 
-                await self.redis_client.hdel(f"{FAILED_SUMMARIZATION_QUEUE}:attempts", news_id)
+                await self._invalidate_news_cache()
                 
             except Exception as e:
-                logger.error(f"Error in summarizer worker main loop: {e}")
+                logger.error("Error in summarizer worker main loop: %s", e)
                 await asyncio.sleep(5)
 
     async def run_once(self) -> int:
         """
         Process up to max_concurrent tasks and return the count of processed items.
-        Uses concurrent tasks to overlap content fetching and DB I/O, while a global
-        LLM RPM limiter ensures Groq rate limits are respected.
+        Content fetching and DB I/O overlap across tasks; summaries are then requested
+        LLM_BATCH_SIZE articles at a time, so the RPM limiter is paid once per request.
         """
         logger.info("Processing a single batch of summarization tasks...")
         await self.initialize()
+        await self.retry_failed_items()
 
         processed_count = 0
 
-        batch: list[tuple[str, int]] = []
-        for _ in range(self.max_concurrent):
-            task = await self.get_next_task()
-            if not task:
-                break
-            batch.append(task)
-
-        if not batch:
+        popped = await self.pop_tasks(self.max_concurrent)
+        if not popped:
             logger.debug("No more tasks in queue")
             return 0
 
-        async def process_one(news_id: str, score: int) -> bool:
-            attempts_data = await self.redis_client.hget(f"{FAILED_SUMMARIZATION_QUEUE}:attempts", news_id)
-            attempt = 1
-            if attempts_data:
-                attempts_info = json.loads(attempts_data)
-                attempt = attempts_info.get("attempts", 1) + 1
+        batch = [(nid, score) for nid, score, _ in popped]
+        attempts_by_id = {nid: data for nid, _, data in popped}
+        ids = [nid for nid, _ in batch]
 
-            logger.info(f"Processing news item {news_id} with priority score {score} (attempt #{attempt})")
-            success = await self.process_news_item(news_id, attempt=attempt)
-            await self.redis_client.hdel(f"{FAILED_SUMMARIZATION_QUEUE}:attempts", news_id)
-            return success
+        async def load_one(news_id: str, score: int, attempts_data: Optional[str]) -> Tuple[int, Optional[Tuple[str, str]], bool]:
+            attempt = self._next_attempt(attempts_data)
+
+            logger.info("Processing news item %s with priority score %s (attempt #%s)", news_id, score, attempt)
+            article, result = await self._load_article(news_id, attempt=attempt, rows=rows)
+            return attempt, article, result
+
+        try:
+            rows = await self.fetch_news_rows(ids)
+        except Exception as e:
+            logger.error("Error fetching %s news items; returning them to the queue: %s", len(batch), e)
+            await self.redis_client.zadd(NEWS_SUMMARIZATION_QUEUE, dict(batch))
+            return 0
+
+        # Cleared before processing, so failures below can record their new attempt
+        retried = [nid for nid in ids if attempts_by_id[nid]]
+        if retried:
+            await self.redis_client.hdel(FAILED_ATTEMPTS_KEY, *retried)
+
+        results: List[bool] = []
+        content_hashes = {nid: row.get("content_hash") for nid, row in rows.items()}
+        known = await cached_summaries_by_hash(self.redis_client, content_hashes)
+        if known:
+            logger.info("Reusing cached summaries for %s news items", len(known))
+            stored = await self.update_news_summaries(known)
+            results.extend(stored for _ in known)
+            batch = [(nid, sc) for nid, sc in batch if nid not in known]
+
+        loaded = await asyncio.gather(*(
+            load_one(nid, sc, attempts_by_id[nid]) for nid, sc in batch
+        ))
+
+        ready: List[Tuple[str, int, str, str]] = []
+        for (news_id, _), (attempt, article, result) in zip(batch, loaded):
+            if article is None:
+                results.append(result)
+            else:
+                ready.append((news_id, attempt, *article))
+
+        results.extend(await self.summarize_articles(ready, content_hashes=content_hashes, scores=dict(batch)))
+
+        await self._invalidate_news_cache()
 
-        results = await asyncio.gather(*(process_one(nid, sc) for nid, sc in batch), return_exceptions=False)
         processed_count = sum(1 for ok in results if ok)
 
-        logger.info(f"Completed batch processing. Processed {processed_count} items.")
+        logger.info("Completed batch processing. Processed %s items.", processed_count)
         return processed_count
 
 
@@ -1,38 +1,40 @@
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 EXCLUDE_DIRS = {".venv", "venv", "env", "__pycache__", ".git"}
 
+# A whole line that is only a comment: optional indentation, then "#", but not a
+# shebang ("#!") and not a coding cookie ("coding" within the first 20 characters).
+_COMMENT_RE = re.compile(r"^[^\S\n]*#(?!!)(?![^\n]{0,13}coding)[^\n]*(?:\n|\Z)", re.MULTILINE)
+
 def should_exclude(path: Path) -> bool:
     return any(part in EXCLUDE_DIRS for part in path.parts)
 
 def process_file(p: Path) -> int:
     try:
-        text = p.read_text(encoding="utf-8")
+        data = p.read_bytes()
     except Exception:
         return 0
+    # Every full-line comment needs a "#"; most files without one are skipped undecoded
+    if b"#" not in data:
+        return 0
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return 0
 
-    lines = text.splitlines(True)
-    removed = 0
-    out = []
-
-    for ln in lines:
-        s = ln.lstrip()
-        if s.startswith("#") and not s.startswith("#!") and "coding" not in s[:20]:
-            removed += 1
-            continue
-        out.append(ln)
-
+    new_text, removed = _COMMENT_RE.subn("", text)
     if removed > 0:
-        p.write_text("".join(out), encoding="utf-8")
+        p.write_bytes(new_text.encode("utf-8"))
     return removed
 
 def main() -> None:
     base = Path(".")
     py_files = [p for p in base.rglob("*.py") if not should_exclude(p)]
-    total_removed = 0
-    for p in py_files:
-        total_removed += process_file(p)
+    with ProcessPoolExecutor() as ex:
+        total_removed = sum(ex.map(process_file, py_files, chunksize=32))
     print(f"Processed {len(py_files)} files; removed {total_removed} full-line comment(s).")
 
 if __name__ == "__main__":